@@ -8,7 +8,7 @@ import numpy as np
 def read_fits_file(file_path):
     """Lee un archivo FITS y extrae los datos espectrales con verificación de calidad"""
     try:
-        with fits.open(file_path) as hdul:
+        with fits.open(file_path, memmap=True) as hdul:
             print("Extensiones disponibles en el archivo FITS:")
             for i, hdu in enumerate(hdul):
                 print(f"{i}: {hdu.name} - {type(hdu)}")
@@ -93,8 +93,23 @@ def valid_mask(flux, ivar):
     m = np.isfinite(flux) & np.isfinite(ivar) & (ivar > 0)
     return m
 
-def rebin_spectrum(wl, flux, ivar, factor=2):
-    """Rebinea el espectro para mejorar SNR"""
+def rebin_spectrum(wl, flux, ivar, factor=2, mask=None):
+    """Rebinea el espectro para mejorar SNR.
+
+    Si se pasa `mask`, el filtrado y el rebinado se fusionan: cada array se
+    recoge una sola vez con los índices válidos agrupados por bin, sin
+    materializar las copias enmascaradas intermedias.
+    """
+    if mask is not None:
+        idx = np.flatnonzero(mask)
+        if factor <= 1:
+            return np.take(wl, idx), np.take(flux, idx), np.take(ivar, idx)
+        n = len(idx) // factor
+        idx = idx[:n*factor].reshape(n, factor)
+        wl_r = np.take(wl, idx).mean(axis=1)
+        var_r = (1.0 / np.take(ivar, idx)).mean(axis=1)
+        flux_r = np.take(flux, idx).mean(axis=1)
+        return wl_r, flux_r, 1.0 / var_r
     if factor <= 1:
         return wl, flux, ivar
     n = len(wl) // factor
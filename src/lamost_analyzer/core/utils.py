@@ -32,36 +32,43 @@ def try_savgol(y, window, poly, moving_avg_window=35):
             w = len(y) - 1 if len(y) % 2 == 0 else len(y)
             w = max(3, w)
             
-        k = np.ones(w) / w
-        
         # Usar mode='constant' en lugar de 'edge' para arrays pequeños
         if len(y) < w:
             y_pad = np.pad(y, (w//2, w//2), mode='constant', constant_values=np.median(y))
         else:
             y_pad = np.pad(y, (w//2, w//2), mode='edge')
-            
-        return np.convolve(y_pad, k, mode="valid")
+
+        # Media móvil por suma acumulada: una sola pasada O(N) sobre los
+        # datos en vez de la convolución O(N·W) con el kernel uniforme
+        c = np.cumsum(y_pad, dtype=np.float64)
+        out = np.empty(len(y_pad) - w + 1, dtype=np.float64)
+        out[0] = c[w - 1]
+        np.subtract(c[w:], c[:-w], out=out[1:])
+        out /= w
+        return out
 
 def running_percentile(y, win=301, q=90):
     """Calcula un percentil móvil para estimar el continuo"""
+    from scipy.ndimage import percentile_filter
     win = max(51, int(win) | 1)
+    y = np.ascontiguousarray(y, dtype=np.float64)
     if win >= len(y):
         return np.full_like(y, np.nanmedian(y))
-    half = win // 2
-    cont = np.empty_like(y)
-    for i in range(len(y)):
-        a = max(0, i - half)
-        b = min(len(y), i + half + 1)
-        cont[i] = np.nanpercentile(y[a:b], q)
-    return cont
+    # percentile_filter es un histograma deslizante en C: un solo bucle
+    # compilado en lugar de evaluar el percentil ventana por ventana
+    return percentile_filter(y, percentile=q, size=win, mode='nearest')
 
 def enhance_line_detection(flux, enhancement_factor=1.5):
     """Realza las líneas espectrales en espectros ruidosos"""
+    flux = np.ascontiguousarray(flux, dtype=np.float64)
+    f_min = np.min(flux)
+    f_range = np.max(flux) - f_min
+
     # Normalizar el flujo
-    norm_flux = (flux - np.min(flux)) / (np.max(flux) - np.min(flux))
-    
+    norm_flux = (flux - f_min) / f_range
+
     # Aplicar transformación no lineal para realzar características
     enhanced_flux = np.power(norm_flux, enhancement_factor)
-    
+
     # Reescalar al rango original
-    return enhanced_flux * (np.max(flux) - np.min(flux)) + np.min(flux)
\ No newline at end of file
+    return enhanced_flux * f_range + f_min
\ No newline at end of file
@@ -6,37 +6,166 @@ Versión Final: Terminal Integrada, Menús Modulares, StyleEngine.
 
 import sys
 import os
+import colorsys
+import functools
+import string
+import threading
+from collections import deque
+from contextlib import contextmanager
+from types import SimpleNamespace
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                              QHBoxLayout, QPushButton, QLabel, QFileDialog, 
                              QTextEdit, QGroupBox, QProgressBar, QMessageBox, 
                              QAction, QMenuBar, QTreeView, QFileSystemModel, 
                              QSplitter, QHeaderView, QLineEdit,
-                             QTableWidget, QTableWidgetItem, QComboBox,
+                             QTableView, QAbstractItemView, QComboBox,
                              QScrollArea, QGridLayout, QDialog, QDialogButtonBox,
                              QColorDialog, QRadioButton, QButtonGroup)
-from PyQt5.QtCore import Qt, QDir, QSettings
+from PyQt5.QtCore import (Qt, QDir, QSettings, QThread, QTimer, QObject,
+                          pyqtSignal, QAbstractTableModel, QModelIndex)
 from PyQt5.QtGui import QPalette, QColor
-import matplotlib.pyplot as plt
+from matplotlib.artist import setp
+from matplotlib.figure import Figure
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
 import numpy as np
 
-# Importaciones nuevas para modo universal
-from astropy.io import fits
-from astropy.table import Table
-
-from lamost_analyzer.core.fits_processor import read_fits_file, valid_mask, rebin_spectrum
-from lamost_analyzer.core.utils import try_savgol, running_percentile, enhance_line_detection
-from lamost_analyzer.core.spectral_analysis import generate_spectral_report
 from lamost_analyzer.config import DEFAULT_PARAMS, SPECTRAL_LINES
 
+# Color fijo de los mensajes de error en la terminal integrada
+_LOG_ERROR_COLOR = QColor("#ff5555")
+
+# Plantilla QSS del diálogo de configuración, parseada una sola vez al
+# importar; apply_dialog_theme solo hace la sustitución de valores
+_DIALOG_QSS_TMPL = string.Template("""
+    QDialog {
+        background-color: $primary;
+        color: $text_primary;
+    }
+    QGroupBox {
+        font-weight: bold;
+        font-size: ${font_11}pt;
+        border: ${border_width}px solid $border;
+        border-radius: ${radius}px;
+        margin-top: 1ex;
+        padding-top: ${padding}px;
+        padding-bottom: ${padding}px;
+        background-color: $secondary;
+        color: $text_primary;
+    }
+    QGroupBox::title {
+        subcontrol-origin: margin;
+        left: ${padding}px;
+        padding: 0 5px 0 5px;
+        color: $accent;
+    }
+    QRadioButton {
+        color: $text_primary;
+        background-color: $secondary;
+        padding: ${px_8}px;
+        spacing: ${px_12}px;
+        font-size: ${font_10}pt;
+    }
+    QRadioButton::indicator {
+        width: ${px_18}px;
+        height: ${px_18}px;
+        border-radius: ${px_9}px;
+        border: ${border_width}px solid $border;
+        background-color: $primary;
+    }
+    QRadioButton::indicator:checked {
+        background-color: $accent;
+        border: ${border_width}px solid $accent;
+    }
+    QLabel {
+        color: $text_primary;
+        background-color: transparent;
+        font-size: ${font_10}pt;
+    }
+    QPushButton {
+        background-color: $accent;
+        color: white;
+        border: none;
+        border-radius: ${px_4}px;
+        padding: ${padding}px ${px_18}px;
+        font-weight: bold;
+        font-size: ${font_10}pt;
+    }
+    QPushButton:hover {
+        background-color: $accent_hover;
+    }
+    QPushButton:pressed {
+        background-color: $accent_pressed;
+    }
+    QPushButton[role="dialog-btn"] {
+        min-height: ${px_35}px;
+    }
+""")
+
+# Tabla de traducción para normalizar separadores de ruta de Windows
+_PATH_TRANS = str.maketrans({'\\': '/'})
+
+# Extensiones de espectro abribles desde el explorador de archivos
+_SPECTRUM_EXT = frozenset({'.fits', '.fit', '.txt', '.csv'})
+
+# Catálogo de líneas congelado en tuplas con la longitud de onda ya
+# formateada: la tabla lo recorre sin str() por celda en cada pintado
+_SPECTRAL_LINES_ROWS = tuple((k, str(v)) for k, v in SPECTRAL_LINES.items())
+
+# El mismo catálogo como arrays paralelos para el filtrado vectorizado
+# de marcas en plot_spectrum
+_SPECTRAL_LINES_NAMES = tuple(SPECTRAL_LINES.keys())
+_SPECTRAL_LINES_WL = np.fromiter(SPECTRAL_LINES.values(), dtype=np.float64,
+                                 count=len(SPECTRAL_LINES))
+
+# Colores de acento predefinidos del diálogo de configuración, como tuplas
+# paralelas (la posición en la rejilla se deriva con divmod sobre el índice)
+_ACCENT_CODES = ("#007acc", "#107c10", "#d83b01", "#e81123", "#b4009e", "#008272")
+_ACCENT_NAMES = ("Azul", "Verde", "Naranja", "Rojo", "Morado", "Turquesa")
+
+# Reglas de los botones de color vía propiedad dinámica "swatch": una sola
+# hoja cubre los seis botones en lugar de un setStyleSheet por botón
+_SWATCH_QSS = "\n".join(
+    f'QPushButton[swatch="{code}"] {{ background-color: {code}; '
+    f'border: 2px solid {code}; border-radius: 20px; }}'
+    for code in _ACCENT_CODES
+) + "\nQPushButton[swatch]:hover { border: 2px solid #ffffff; }"
+
 
 # ==============================================================================
 # 1. STYLE ENGINE (Gestor de Estilos Centralizado)
 # ==============================================================================
+@functools.lru_cache(maxsize=8)
+def _scaled(scale):
+    """Tabla de constantes pre-escaladas por valor de escala.
+
+    Evita recomputar los mismos int(K * scale) en cada construcción de
+    widgets o refresco de estilos; pxK y ptK comparten valor, el alias
+    solo documenta la unidad en el punto de uso."""
+    sizes = (1, 2, 3, 4, 5, 8, 9, 10, 11, 12, 15, 16, 18, 20, 24, 25, 28,
+             30, 35, 45, 60, 70, 100, 150, 600)
+    values = {'px%d' % k: int(k * scale) for k in sizes}
+    values.update({'pt%d' % k: values['px%d' % k] for k in (9, 10, 11, 12)})
+    return SimpleNamespace(**values)
+
+
+def _memoize_style(fn):
+    """Memoiza un builder de estilos sobre (tema, escala).
+
+    Los temas son dicts de cadenas, así que tuple(sorted(items)) da una
+    clave hashable estable; cambiar de tema reutiliza el CSS ya armado en
+    vez de re-interpolar las f-strings en cada repintado."""
+    cached = functools.lru_cache(maxsize=32)(
+        lambda theme_items, scale: fn(dict(theme_items), scale))
+
+    def wrapper(theme, scale):
+        return cached(tuple(sorted(theme.items())), scale)
+    return staticmethod(wrapper)
+
+
 class StyleEngine:
     """Motor centralizado de estilos para evitar repetir código CSS"""
-    
+
     @staticmethod
     def _px(size, scale):
         return int(size * scale)
@@ -45,7 +174,7 @@ class StyleEngine:
     def _pt(size, scale):
         return int(size * scale)
 
-    @staticmethod
+    @_memoize_style
     def get_groupbox_style(theme, scale):
         s = scale
         return f"""
@@ -67,7 +196,7 @@ class StyleEngine:
             }}
         """
 
-    @staticmethod
+    @_memoize_style
     def get_combobox_style(theme, scale):
         s = scale
         return f"""
@@ -104,15 +233,15 @@ class StyleEngine:
             }}
         """
 
-    @staticmethod
+    @_memoize_style
     def get_label_style(theme, scale):
         return f"color: {theme['text_secondary']}; font-weight: bold; font-size: {StyleEngine._pt(10, scale)}pt;"
 
-    @staticmethod
+    @_memoize_style
     def get_table_style(theme, scale):
         s = scale
         return f"""
-            QTableWidget {{
+            QTableView {{
                 background-color: {theme['primary']};
                 border: {StyleEngine._px(1, s)}px solid {theme['border']};
                 border-radius: {StyleEngine._px(4, s)}px;
@@ -120,11 +249,11 @@ class StyleEngine:
                 gridline-color: {theme['border']};
                 font-size: {StyleEngine._pt(9, s)}pt;
             }}
-            QTableWidget::item {{
+            QTableView::item {{
                 padding: {StyleEngine._px(6, s)}px;
                 border-bottom: {StyleEngine._px(1, s)}px solid {theme['border']};
             }}
-            QTableWidget::item:selected {{
+            QTableView::item:selected {{
                 background-color: {theme['accent']};
                 color: #ffffff;
             }}
@@ -139,7 +268,7 @@ class StyleEngine:
             }}
         """
 
-    @staticmethod
+    @_memoize_style
     def get_scrollarea_style(theme, scale):
         s = scale
         return f"""
@@ -183,56 +312,61 @@ class StyleEngine:
 # 2. LOGGER WIDGET (Terminal)
 # ==============================================================================
 class LoggerWidget(QTextEdit):
-    """Widget estilo Terminal para ver logs y diagnósticos"""
+    """Widget estilo Terminal para ver logs y diagnósticos.
+
+    El estilo visual viene de la hoja de estilos global de la aplicación
+    (selector `LoggerWidget`), no de setStyleSheet por instancia.
+    """
     def __init__(self, theme_manager=None, scale=1.0):
         super().__init__()
         self.theme_manager = theme_manager
         self.scale = scale
         self.setReadOnly(True)
         self.setMinimumHeight(int(100 * scale))
-        self.apply_style()
-        
+        self._log_buffer = deque()
+        self._log_lock = threading.Lock()
+        # Temporizador persistente del hilo de la GUI: drena la cola a
+        # ~60 Hz con salida inmediata si está vacía, de modo que el
+        # volcado nunca depende del hilo desde el que se encoló
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setInterval(16)
+        self._flush_timer.timeout.connect(self._flush_log)
+        self._flush_timer.start()
+
         font = self.font()
         font.setFamily("Consolas, 'Courier New', monospace")
         font.setPointSize(int(9 * scale))
         self.setFont(font)
 
-    def apply_style(self):
-        theme = self.theme_manager.get_current_theme()
-        s = self.scale
-        self.setStyleSheet(f"""
-            QTextEdit {{
-                background-color: {theme['primary']};
-                color: #00ff00;
-                border: {int(1*s)}px solid {theme['border']};
-                border-radius: {int(4*s)}px;
-                padding: {int(5*s)}px;
-                font-family: 'Consolas', 'Courier New', monospace;
-                font-size: {int(9*s)}pt;
-            }}
-            QScrollBar:vertical {{
-                background-color: {theme['secondary']};
-                width: {int(10*s)}px;
-                margin: 0px;
-            }}
-            QScrollBar::handle:vertical {{
-                background-color: {theme['accent']};
-                border-radius: {int(3*s)}px;
-            }}
-        """)
-
     def write_log(self, message):
-        cursor = self.textCursor()
-        cursor.movePosition(cursor.End)
-        
-        if "error" in message.lower() or "exception" in message.lower():
-            self.setTextColor(QColor("#ff5555"))
-        else:
-            theme = self.theme_manager.get_current_theme()
-            self.setTextColor(QColor(theme['text_secondary']))
-            
-        cursor.insertText(message)
-        self.setTextCursor(cursor)
+        # Coalescer los mensajes: muchos print seguidos se vuelcan en una
+        # sola inserción por tick del temporizador, en lugar de un layout
+        # + repintado del QTextDocument por cada llamada. Aquí solo se
+        # encola bajo candado; es seguro desde cualquier hilo
+        with self._log_lock:
+            self._log_buffer.append(message)
+
+    def _flush_log(self):
+        with self._log_lock:
+            if not self._log_buffer:
+                return
+            chunk = "".join(self._log_buffer)
+            self._log_buffer.clear()
+
+        self.setUpdatesEnabled(False)
+        try:
+            cursor = self.textCursor()
+            cursor.movePosition(cursor.End)
+
+            if "error" in chunk.lower() or "exception" in chunk.lower():
+                self.setTextColor(_LOG_ERROR_COLOR)
+            else:
+                self.setTextColor(self.theme_manager.qcolor('text_secondary'))
+
+            cursor.insertText(chunk)
+            self.setTextCursor(cursor)
+        finally:
+            self.setUpdatesEnabled(True)
         self.ensureCursorVisible()
 
     def clear_log(self):
@@ -242,14 +376,23 @@ class LoggerWidget(QTextEdit):
 # ==============================================================================
 # 3. STREAM TO LOGGER (Magia para print)
 # ==============================================================================
-class StreamToLogger:
-    """Redirige el flujo de salida estándar a nuestro LoggerWidget"""
+class StreamToLogger(QObject):
+    """Redirige el flujo de salida estándar a nuestro LoggerWidget.
+
+    El texto viaja por una señal: los print del hilo de análisis (lector
+    FITS, tracebacks del worker) llegan por conexión en cola al hilo de
+    la GUI, que es el único que puede tocar el QTextEdit.
+    """
+    _message = pyqtSignal(str)
+
     def __init__(self, logger_widget):
+        super().__init__()
         self.logger = logger_widget
+        self._message.connect(logger_widget.write_log)
 
     def write(self, message):
         if message.strip() != "":
-            self.logger.write_log(message)
+            self._message.emit(message)
 
     def flush(self):
         pass
@@ -334,25 +477,39 @@ class MenuManager:
 # ==============================================================================
 # 5. CARGADOR UNIVERSAL
 # ==============================================================================
+_FLUX_NAMES = ('flux', 'FLUX', 'Flux', 'intensity', 'Intensity')
+_WAVE_NAMES = ('wavelength', 'WAVELENGTH', 'lambda', 'loglam')
+
+
 def load_spectrum_universal(file_path):
     """
     Carga FITS o TXT de forma universal.
     Devuelve: (wavelength, flux)
     """
+    # Import diferido: astropy solo se paga al analizar, no al arrancar la GUI
+    from astropy.io import fits
+    from astropy.table import Table
+
     try:
-        with fits.open(file_path) as hdul:
+        with fits.open(file_path, memmap=True) as hdul:
             data = hdul[1].data if len(hdul) > 1 else hdul[0].data
             header = hdul[0].header
             wavelength, flux = None, None
 
             if isinstance(data, fits.fitsrec.FITS_rec):
                 colnames = data.columns.names
-                flux_col = next((c for c in ['flux', 'FLUX', 'Flux', 'intensity', 'Intensity'] if c in colnames), None)
-                wave_col = next((c for c in ['wavelength', 'WAVELENGTH', 'lambda', 'loglam'] if c in colnames), None)
-                
+                # Buscar en un set: O(1) por candidato en tablas anchas
+                col_set = set(colnames)
+                flux_col = next((c for c in _FLUX_NAMES if c in col_set), None)
+                wave_col = next((c for c in _WAVE_NAMES if c in col_set), None)
+
                 if flux_col and wave_col:
-                    flux = data[flux_col]
-                    wavelength = data[wave_col]
+                    flux = np.array(data[flux_col], dtype=float)
+                    if wave_col == 'loglam':
+                        # loglam (SDSS) es log10(lambda): conversión vectorizada
+                        wavelength = np.power(10.0, np.asarray(data[wave_col], dtype=np.float64))
+                    else:
+                        wavelength = np.array(data[wave_col], dtype=float)
                 else:
                     if len(colnames) >= 2:
                         wavelength = np.array(data[colnames[0]])
@@ -365,13 +522,16 @@ def load_spectrum_universal(file_path):
                 crpix = header.get('CRPIX1', 1)
                 
                 if crval is not None and cdelt is not None:
+                    # linspace: una sola asignación en vez de tres arrays temporales
                     n_pixels = len(flux)
-                    wavelength = crval + (np.arange(n_pixels) - crpix + 1) * cdelt
+                    start = crval + (1 - crpix) * cdelt
+                    wavelength = np.linspace(start, start + (n_pixels - 1) * cdelt,
+                                             n_pixels, dtype=np.float64)
                 else:
                     wavelength = np.arange(len(flux))
             
             if wavelength is not None:
-                return np.array(wavelength), np.array(flux)
+                return np.asarray(wavelength), np.asarray(flux)
 
     except Exception as e:
         pass
@@ -385,6 +545,107 @@ def load_spectrum_universal(file_path):
     return None, None
 
 
+# ==============================================================================
+# 5b. ANALYSIS WORKER (Hilo de análisis)
+# ==============================================================================
+class AnalysisWorker(QObject):
+    """Ejecuta el pipeline de análisis en un hilo aparte del GUI.
+
+    Emite `progress` durante el procesado y `finished` con un dict de
+    resultados; la ventana principal solo recibe datos y repinta.
+    """
+
+    progress = pyqtSignal(int)
+    finished = pyqtSignal(object)
+    error = pyqtSignal(str)
+
+    def __init__(self, file_path, source_type, params, lines_dict):
+        super().__init__()
+        self.file_path = file_path
+        self.source_type = source_type
+        self.params = params
+        self.lines_dict = lines_dict
+
+    def run(self):
+        # Import diferido: el paquete core arrastra astropy y scipy, que
+        # solo se pagan en el primer análisis y no al arrancar la GUI
+        from lamost_analyzer.core.fits_processor import read_fits_file, valid_mask, rebin_spectrum
+        from lamost_analyzer.core.utils import try_savgol, running_percentile, enhance_line_detection
+        from lamost_analyzer.core.spectral_analysis import generate_spectral_report
+
+        try:
+            params = self.params
+            warnings = []
+
+            if self.source_type == "LAMOST":
+                wl, flux, ivar = read_fits_file(self.file_path)
+                self.progress.emit(30)
+
+                # Filtrado y rebinado fusionados: rebin_spectrum recoge los
+                # índices válidos directamente, sin copias enmascaradas
+                m = valid_mask(flux, ivar)
+                wl_r, flux_r, ivar_r = rebin_spectrum(wl, flux, ivar,
+                                                      factor=params["REBIN_FACTOR"], mask=m)
+                if len(flux_r) == 0:
+                    self.error.emit("Array vacío tras rebinado.")
+                    return
+                # Liberar los buffers pre-rebinado antes del filtrado: solo
+                # los arrays rebinados siguen vivos durante el análisis
+                del wl, flux, ivar, m
+            else:
+                print("Usando cargador universal en GUI...")
+                wl, flux = load_spectrum_universal(self.file_path)
+
+                if wl is None:
+                    self.error.emit("No se pudo leer el archivo en modo Universal.")
+                    return
+
+                # Simulamos ivar (inverso de varianza) para que los filtros
+                # posteriores no rompan. El reporte solo lo lee, así que una
+                # vista broadcast de solo lectura evita materializar el array
+                ivar = np.broadcast_to(np.float64(100.0), flux.shape)
+
+                # Para datos universales, asumimos que ya vienen bien calibrados y saltamos el rebinado
+                wl_r, flux_r, ivar_r = wl, flux, ivar
+
+            self.progress.emit(50)
+
+            current_sg_window = params["SG_WINDOW"]
+            if params["SG_WINDOW"] > len(flux_r):
+                current_sg_window = max(3, len(flux_r)-1)
+                warnings.append(f"⚠ SG_WINDOW ajustado a {current_sg_window}")
+
+            flux_smooth = try_savgol(flux_r, window=current_sg_window, poly=params["SG_POLY"], moving_avg_window=params["MOVING_AVG_WINDOW"])
+            flux_enhanced = enhance_line_detection(flux_smooth, enhancement_factor=1.3)
+            self.progress.emit(70)
+
+            if params["DO_CONTINUUM_NORM"]:
+                cont = running_percentile(flux_enhanced, win=params["CONTINUUM_WINDOW"], q=params["CONTINUUM_PERCENTILE"])
+                # Sustituir solo los valores no positivos por la mediana
+                # positiva, in situ: putmask no toca el resto del continuo
+                pos = cont > 0
+                med = np.median(cont[pos]) if pos.any() else 1.0
+                np.putmask(cont, ~pos, med)
+                # División in situ: flux_enhanced ya no se usa después
+                np.divide(flux_enhanced, cont, out=flux_enhanced)
+                flux_plot = flux_enhanced
+            else:
+                flux_plot = flux_enhanced
+
+            report = generate_spectral_report(wl_r, flux_plot, ivar_r, self.lines_dict,
+                                              redshift_sigma_clip=params["REDSHIFT_SIGMA_CLIP"])
+            self.progress.emit(90)
+
+            self.finished.emit({
+                'wl_r': wl_r, 'flux_r': flux_r, 'flux_plot': flux_plot,
+                'report': report, 'warnings': warnings,
+            })
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            self.error.emit(str(e))
+
+
 # ==============================================================================
 # 6. THEME MANAGER
 # ==============================================================================
@@ -424,40 +685,121 @@ class ThemeManager:
         self.settings = QSettings("LAMOST", "SpectrumAnalyzer")
         self.current_theme_name = self.settings.value("theme", "dark")
         self.custom_accent = self.settings.value("accent_color", "#007acc")
-        
+        self._dirty = {}
+
         screen = QApplication.primaryScreen().availableGeometry()
         height = screen.height()
-        
+
         if height < 1300:
             self.scale = 0.9
         else:
             self.scale = 0.75
-        
-    def get_current_theme(self):
+
+        self._rebuild()
+
+    def _rebuild(self):
+        """Reconstruye el dict de tema completo (con variantes del acento).
+
+        Se llama solo cuando cambia el tema o el color de acento, de modo que
+        get_current_theme() no tenga que recalcular nada en cada invocación.
+        """
         theme = self.THEMES[self.current_theme_name].copy()
         theme["accent"] = self.custom_accent
         theme["accent_hover"] = self._lighten_color(theme["accent"], 20)
         theme["accent_pressed"] = self._darken_color(theme["accent"], 20)
-        return theme
-    
+        # Internar los valores "#rrggbb": cada reconstrucción y cada clave
+        # de cache de estilos reutiliza los mismos objetos str, con
+        # comparaciones por puntero en los lookups posteriores
+        self._current = {key: sys.intern(value) for key, value in theme.items()}
+        theme = self._current
+        # QColor por clave construido una vez por tema: los llamadores no
+        # vuelven a parsear "#rrggbb" en cada uso
+        self._qcolors = {key: QColor(value) for key, value in theme.items()}
+        self._palette = None
+
+    def qcolor(self, key):
+        """QColor precalculado para una clave del tema actual"""
+        return self._qcolors[key]
+
+    def get_current_theme(self):
+        return self._current
+
+    def get_palette(self):
+        """Devuelve la QPalette del tema actual, construida una sola vez.
+
+        Evita re-parsear 13 cadenas hex con QColor en cada apply_theme.
+        """
+        if self._palette is None:
+            colors = self._qcolors
+            palette = QPalette()
+            palette.setColor(QPalette.Window, colors['primary'])
+            palette.setColor(QPalette.WindowText, colors['text_primary'])
+            palette.setColor(QPalette.Base, colors['primary'])
+            palette.setColor(QPalette.AlternateBase, colors['secondary'])
+            palette.setColor(QPalette.ToolTipBase, colors['text_primary'])
+            palette.setColor(QPalette.ToolTipText, colors['text_primary'])
+            palette.setColor(QPalette.Text, colors['text_primary'])
+            palette.setColor(QPalette.Button, colors['secondary'])
+            palette.setColor(QPalette.ButtonText, colors['text_primary'])
+            palette.setColor(QPalette.BrightText, Qt.red)
+            palette.setColor(QPalette.Link, colors['accent'])
+            palette.setColor(QPalette.Highlight, colors['accent'])
+            palette.setColor(QPalette.HighlightedText, colors['secondary'])
+            self._palette = palette
+        return self._palette
+
     def set_theme(self, theme_name):
+        if theme_name == self.current_theme_name:
+            return
         if theme_name in self.THEMES:
             self.current_theme_name = theme_name
-            self.settings.setValue("theme", theme_name)
-    
+            self._dirty["theme"] = theme_name
+            self._rebuild()
+
     def set_accent_color(self, color):
+        if color == self.custom_accent:
+            return
         self.custom_accent = color
-        self.settings.setValue("accent_color", color)
-    
+        self._dirty["accent_color"] = color
+        self._rebuild()
+
+    def flush_settings(self):
+        """Persiste en QSettings los cambios acumulados.
+
+        Los setters solo actualizan el estado en memoria: la escritura a
+        disco se difiere aquí para que las previsualizaciones en vivo no
+        paguen I/O síncrona por cada cambio de color o tema.
+        """
+        for key, value in self._dirty.items():
+            self.settings.setValue(key, value)
+        self._dirty.clear()
+
     def reset_to_defaults(self):
         self.set_theme("dark")
         self.set_accent_color("#007acc")
     
+    @staticmethod
+    @functools.lru_cache(maxsize=128)
+    def _scale_value(color, factor):
+        """Escala el canal V (HSV) de un color '#rrggbb' sin pasar por QColor.
+
+        Equivale a QColor.lighter()/darker() pero con aritmética pura en
+        Python, evitando dos construcciones de QColor y la serialización
+        .name() por llamada. Las entradas son inmutables, así que el
+        resultado se memoiza por (color, factor).
+        """
+        r = int(color[1:3], 16)
+        g = int(color[3:5], 16)
+        b = int(color[5:7], 16)
+        h, s, v = colorsys.rgb_to_hsv(r / 255.0, g / 255.0, b / 255.0)
+        r, g, b = colorsys.hsv_to_rgb(h, s, min(1.0, v * factor))
+        return "#%02x%02x%02x" % (int(r * 255 + 0.5), int(g * 255 + 0.5), int(b * 255 + 0.5))
+
     def _lighten_color(self, color, percent):
-        return QColor(color).lighter(100 + percent).name()
-    
+        return self._scale_value(color, (100 + percent) / 100.0)
+
     def _darken_color(self, color, percent):
-        return QColor(color).darker(100 + percent).name()
+        return self._scale_value(color, 100.0 / (100 + percent))
 
 
 # ==============================================================================
@@ -471,94 +813,93 @@ class SettingsDialog(QDialog):
         self.theme_manager = theme_manager
         self.parent = parent
         self.scale = theme_manager.scale
+        self._sc = _scaled(self.scale)
+        self._batching = 0
+        self._update_pending = False
+        self._pending_color = None
         base_font = self.font()
-        base_font.setPointSize(int(10 * self.scale))
+        base_font.setPointSize(self._sc.pt10)
         self.setFont(base_font)
         self.init_ui()
         self.apply_dialog_theme()
-        
+
+    @contextmanager
+    def _batch_updates(self):
+        """Agrupa varias mutaciones síncronas en un solo repintado de estilos"""
+        self._batching += 1
+        try:
+            yield
+        finally:
+            self._batching -= 1
+            if self._batching == 0:
+                self._apply_all()
+
+    def _apply_all(self):
+        self.update_color_preview()
+        self.update_preview()
+        self.apply_changes()
+
+    # Caches del QSS final por (tema, acento, escala): alternar entre temas
+    # ya visitados evita la sustitución de plantillas y reutiliza las
+    # mismas cadenas, dejando solo el parseo de Qt en setStyleSheet.
+    _QSS_CACHE = {}
+    _PREVIEW_QSS_CACHE = {}
+
     def apply_dialog_theme(self):
-        theme = self.theme_manager.get_current_theme()
-        s = self.scale
-        border_width = int(2 * s)
-        radius = int(5 * s)
-        padding = int(10 * s)
-        self.setStyleSheet(f"""
-            QDialog {{
-                background-color: {theme['primary']};
-                color: {theme['text_primary']};
-            }}
-            QGroupBox {{
-                font-weight: bold;
-                font-size: {int(11 * s)}pt;
-                border: {border_width}px solid {theme['border']};
-                border-radius: {radius}px;
-                margin-top: 1ex;
-                padding-top: {padding}px;
-                padding-bottom: {padding}px;
-                background-color: {theme['secondary']};
-                color: {theme['text_primary']};
-            }}
-            QGroupBox::title {{
-                subcontrol-origin: margin;
-                left: {int(10 * s)}px;
-                padding: 0 5px 0 5px;
-                color: {theme['accent']};
-            }}
-            QRadioButton {{
-                color: {theme['text_primary']};
-                background-color: {theme['secondary']};
-                padding: {int(8 * s)}px;
-                spacing: {int(12 * s)}px;
-                font-size: {int(10 * s)}pt;
-            }}
-            QRadioButton::indicator {{
-                width: {int(18 * s)}px;
-                height: {int(18 * s)}px;
-                border-radius: {int(9 * s)}px;
-                border: {border_width}px solid {theme['border']};
-                background-color: {theme['primary']};
-            }}
-            QRadioButton::indicator:checked {{
-                background-color: {theme['accent']};
-                border: {border_width}px solid {theme['accent']};
-            }}
-            QLabel {{
-                color: {theme['text_primary']};
-                background-color: transparent;
-                font-size: {int(10 * s)}pt;
-            }}
-            QPushButton {{
-                background-color: {theme['accent']};
-                color: white;
-                border: none;
-                border-radius: {int(4 * s)}px;
-                padding: {int(10 * s)}px {int(18 * s)}px;
-                font-weight: bold;
-                font-size: {int(10 * s)}pt;
-            }}
-            QPushButton:hover {{
-                background-color: {theme['accent_hover']};
-            }}
-            QPushButton:pressed {{
-                background-color: {theme['accent_pressed']};
-            }}
-        """)
+        manager = self.theme_manager
+        key = (manager.current_theme_name, manager.custom_accent, self.scale)
+        qss = self._QSS_CACHE.get(key)
+        if qss is None:
+            qss = self._QSS_CACHE[key] = _DIALOG_QSS_TMPL.substitute(
+                manager.get_current_theme(),
+                border_width=self._sc.px2,
+                radius=self._sc.px5,
+                padding=self._sc.px10,
+                font_11=self._sc.px11,
+                font_10=self._sc.px10,
+                px_4=self._sc.px4,
+                px_8=self._sc.px8,
+                px_9=self._sc.px9,
+                px_12=self._sc.px12,
+                px_18=self._sc.px18,
+                px_35=self._sc.px35,
+            ) + _SWATCH_QSS
+        self.setStyleSheet(qss)
         
     def init_ui(self):
         self.setWindowTitle("Configuración de Tema y Colores")
-        w = int(600 * self.scale)
-        h = int(600 * self.scale)
-        self.setMinimumSize(w, h) 
+        w = self._sc.px600
+        h = self._sc.px600
+        self.setMinimumSize(w, h)
         self.resize(w, h)
-        
+
         layout = QVBoxLayout(self)
-        layout.setSpacing(int(25 * self.scale)) 
-        layout.setContentsMargins(int(30 * self.scale), int(30 * self.scale), int(30 * self.scale), int(30 * self.scale))
-        
+        layout.setSpacing(self._sc.px25)
+        layout.setContentsMargins(self._sc.px30, self._sc.px30, self._sc.px30, self._sc.px30)
+
+        # Solo el grupo de tema se construye de inmediato; los grupos de
+        # color, vista previa y reset se difieren al primer showEvent para
+        # abaratar la construcción del diálogo.
+        layout.addWidget(self._build_theme_group())
+        layout.addStretch(1)
+        layout.addWidget(self._build_button_box())
+        self._main_layout = layout
+        self._groups_built = False
+
+    def showEvent(self, event):
+        if not self._groups_built:
+            self._groups_built = True
+            layout = self._main_layout
+            layout.insertWidget(1, self._build_color_group())
+            layout.insertWidget(2, self._build_preview_group())
+            layout.insertWidget(3, self._build_reset_group())
+            self.update_preview()
+        super().showEvent(event)
+
+    def _build_theme_group(self):
         theme_group = QGroupBox("Selección de Tema")
         theme_layout = QVBoxLayout(theme_group)
-        theme_layout.setSpacing(int(10 * self.scale)) 
+        theme_layout.setSpacing(self._sc.px10) 
         
         self.theme_buttons = QButtonGroup(self)
         self.dark_radio = QRadioButton("Modo Oscuro")
@@ -576,24 +917,28 @@ class SettingsDialog(QDialog):
             self.light_radio.setChecked(True)
         else:
             self.system_radio.setChecked(True)
-        
+        self._selected_theme = current_theme if current_theme in ("dark", "light") else "dark"
+        self.theme_buttons.buttonClicked.connect(self._on_theme_button_clicked)
+
         theme_layout.addWidget(self.dark_radio)
         theme_layout.addWidget(self.light_radio)
         theme_layout.addWidget(self.system_radio)
-        
+        return theme_group
+
+    def _build_color_group(self):
         color_group = QGroupBox("Color Secundario/Acento")
         color_layout = QVBoxLayout(color_group)
-        color_layout.setSpacing(int(15 * self.scale))
+        color_layout.setSpacing(self._sc.px15)
         
         color_preview_layout = QHBoxLayout()
         self.color_preview = QLabel()
-        self.color_preview.setFixedSize(int(70 * self.scale), int(45 * self.scale))
+        self.color_preview.setFixedSize(self._sc.px70, self._sc.px45)
         self.update_color_preview()
         self.color_name = QLabel(self.theme_manager.custom_accent)
-        self.color_name.setStyleSheet(f"font-weight: bold; font-size: {int(12 * self.scale)}pt;")
+        self.color_name.setStyleSheet(f"font-weight: bold; font-size: {self._sc.pt12}pt;")
         self.btn_choose_color = QPushButton("Elegir Color...")
         self.btn_choose_color.clicked.connect(self.choose_accent_color)
-        self.btn_choose_color.setMinimumHeight(int(35 * self.scale))
+        self.btn_choose_color.setProperty("role", "dialog-btn")
         
         color_preview_layout.addWidget(self.color_preview)
         color_preview_layout.addWidget(self.color_name)
@@ -602,87 +947,81 @@ class SettingsDialog(QDialog):
         
         predefined_layout = QVBoxLayout()
         predefined_label = QLabel("Colores predefinidos:")
-        predefined_label.setStyleSheet(f"font-size: {int(12 * self.scale)}pt; margin-bottom: 5px;")
+        predefined_label.setStyleSheet(f"font-size: {self._sc.pt12}pt; margin-bottom: 5px;")
         predefined_layout.addWidget(predefined_label)
         
         colors_grid = QGridLayout()
-        colors_grid.setSpacing(int(15 * self.scale))
-        colors = [
-            ("#007acc", "Azul", 0, 0),
-            ("#107c10", "Verde", 0, 1),
-            ("#d83b01", "Naranja", 0, 2),
-            ("#e81123", "Rojo", 1, 0),
-            ("#b4009e", "Morado", 1, 1),
-            ("#008272", "Turquesa", 1, 2)
-        ]
-        btn_size = int(45 * self.scale)
-        for color_code, color_name, row, col in colors:
+        colors_grid.setSpacing(self._sc.px15)
+        btn_size = self._sc.px45
+        for i, color_code in enumerate(_ACCENT_CODES):
+            row, col = divmod(i, 3)
             btn = QPushButton("")
             btn.setFixedSize(btn_size, btn_size)
-            btn.setStyleSheet(f"QPushButton {{ background-color: {color_code}; border: 2px solid {color_code}; border-radius: 20px; }}"
-                            f"QPushButton:hover {{ border: 2px solid #ffffff; }}")
-            btn.setToolTip(color_name)
+            # El estilo viene de las reglas [swatch="..."] de la hoja del
+            # diálogo: ningún setStyleSheet por botón
+            btn.setProperty("swatch", color_code)
+            btn.setToolTip(_ACCENT_NAMES[i])
             btn.clicked.connect(lambda checked, c=color_code: self.set_predefined_color(c))
             colors_grid.addWidget(btn, row, col)
         
         predefined_layout.addLayout(colors_grid)
         color_layout.addLayout(color_preview_layout)
         color_layout.addLayout(predefined_layout)
-        
+        return color_group
+
+    def _build_preview_group(self):
         preview_group = QGroupBox("Vista Previa")
         preview_layout = QVBoxLayout(preview_group)
         
         preview_widget = QWidget()
-        preview_widget.setFixedHeight(int(100 * self.scale))
+        preview_widget.setFixedHeight(self._sc.px100)
         preview_widget.setObjectName("previewWidget")
         
         preview_layout_inner = QHBoxLayout(preview_widget)
         preview_button = QPushButton("Botón de Ejemplo")
         preview_button.setObjectName("previewButton")
-        preview_button.setMinimumHeight(int(30 * self.scale))
         preview_label = QLabel("Texto de ejemplo")
         preview_label.setObjectName("previewLabel")
+        # Referencias directas: update_preview no recorre el árbol de
+        # widgets con findChild en cada refresco
+        self._preview_widget = preview_widget
+        self._preview_button = preview_button
+        self._preview_label = preview_label
         
         preview_layout_inner.addWidget(preview_button)
         preview_layout_inner.addWidget(preview_label)
         preview_layout_inner.addStretch()
         preview_layout.addWidget(preview_widget)
-        
+        return preview_group
+
+    def _build_reset_group(self):
         reset_group = QGroupBox("Restablecer Configuración")
         reset_layout = QHBoxLayout(reset_group)
         self.btn_reset = QPushButton("Restablecer a Valores por Defecto")
         self.btn_reset.clicked.connect(self.reset_to_defaults)
-        self.btn_reset.setMinimumHeight(int(35 * self.scale))
+        self.btn_reset.setProperty("role", "dialog-btn")
         reset_layout.addWidget(self.btn_reset)
-        
+        return reset_group
+
+    def _build_button_box(self):
         button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel | QDialogButtonBox.Apply)
-        button_layout = button_box.layout()
-        for i in range(button_layout.count()):
-             item = button_layout.itemAt(i)
-             if item.widget():
-                 btn = item.widget()
-                 btn.setMinimumHeight(int(35 * self.scale))
-
-        button_box.setCenterButtons(True) 
+        # La altura mínima la aporta la regla [role="dialog-btn"] de la hoja
+        for btn in button_box.buttons():
+            btn.setProperty("role", "dialog-btn")
+
+        button_box.setCenterButtons(True)
         button_box.accepted.connect(self.accept)
         button_box.rejected.connect(self.reject)
         button_box.button(QDialogButtonBox.Apply).clicked.connect(self.apply_changes)
-        
-        layout.addWidget(theme_group)
-        layout.addWidget(color_group)
-        layout.addWidget(preview_group)
-        layout.addWidget(reset_group)
-        
-        layout.addStretch(1) 
-        
-        layout.addWidget(button_box)
-        self.update_preview()
-        
+        return button_box
+
+
     def update_color_preview(self):
-        theme = self.theme_manager.get_current_theme()
+        manager = self.theme_manager
+        theme = manager.get_current_theme()
         self.color_preview.setStyleSheet(f"""
             QLabel {{
-                background-color: {self.theme_manager.custom_accent};
+                background-color: {manager.custom_accent};
                 border: 2px solid {theme['border']};
                 border-radius: 4px;
             }}
@@ -697,47 +1036,74 @@ class SettingsDialog(QDialog):
         self.set_accent_color(color_code)
         
     def set_accent_color(self, color_code):
+        # Coalescer: varios clics rápidos sólo encolan el último color y un
+        # único repintado al volver al bucle de eventos
+        self._pending_color = color_code
+        if not self._update_pending:
+            self._update_pending = True
+            QTimer.singleShot(0, self._flush_accent_update)
+
+    def _flush_accent_update(self):
+        self._update_pending = False
+        color_code = self._pending_color
+        if color_code is None:
+            return
+        self._pending_color = None
         self.theme_manager.set_accent_color(color_code)
         self.color_name.setText(color_code)
-        self.update_color_preview()
-        self.update_preview()
+        if not self._batching:
+            self.update_color_preview()
+            self.update_preview()
         
     def update_preview(self):
-        theme = self.theme_manager.get_current_theme()
-        s = self.scale
-        preview_widget = self.findChild(QWidget, "previewWidget")
-        if preview_widget:
-            preview_widget.setStyleSheet(f"background-color: {theme['secondary']}; border: 1px solid {theme['border']}; border-radius: 4px;")
-        
-        preview_button = self.findChild(QPushButton, "previewButton")
-        if preview_button:
-            preview_button.setStyleSheet(f"""
+        manager = self.theme_manager
+        key = (manager.current_theme_name, manager.custom_accent, self.scale)
+        styles = self._PREVIEW_QSS_CACHE.get(key)
+        if styles is None:
+            theme = manager.get_current_theme()
+            styles = self._PREVIEW_QSS_CACHE[key] = (
+                f"background-color: {theme['secondary']}; border: 1px solid {theme['border']}; border-radius: 4px;",
+                f"""
                 QPushButton#previewButton {{
                     background-color: {theme['accent']};
                     color: white;
                     border: none;
                     border-radius: 4px;
-                    padding: {int(8*s)}px {int(16*s)}px;
+                    padding: {self._sc.px8}px {self._sc.px16}px;
                     font-weight: bold;
-                    font-size: {int(10*s)}pt;
+                    font-size: {self._sc.pt10}pt;
+                    min-height: {self._sc.px30}px;
                 }}
                 QPushButton#previewButton:hover {{
                     background-color: {theme['accent_hover']};
                 }}
-            """)
-        
-        preview_label = self.findChild(QLabel, "previewLabel")
-        if preview_label:
-            preview_label.setStyleSheet(f"color: {theme['text_primary']}; font-weight: bold; font-size: {int(10*s)}pt;")
-        
-    def get_selected_theme(self):
-        if self.dark_radio.isChecked():
-            return "dark"
-        elif self.light_radio.isChecked():
-            return "light"
+                """,
+                f"color: {theme['text_primary']}; font-weight: bold; font-size: {self._sc.pt10}pt;",
+            )
+        self._preview_widget.setStyleSheet(styles[0])
+        self._preview_button.setStyleSheet(styles[1])
+        self._preview_label.setStyleSheet(styles[2])
+        
+    def sync_from_manager(self):
+        """Sincroniza los controles con el ThemeManager sin reconstruir widgets"""
+        current_theme = self.theme_manager.current_theme_name
+        if current_theme == "light":
+            self.light_radio.setChecked(True)
         else:
-            return "dark"
-        
+            self.dark_radio.setChecked(True)
+        self._selected_theme = current_theme if current_theme in ("dark", "light") else "dark"
+        self.color_name.setText(self.theme_manager.custom_accent)
+        self.update_color_preview()
+        self.update_preview()
+        self.apply_dialog_theme()
+
+    def _on_theme_button_clicked(self, button):
+        # El modo "sistema" usa el tema oscuro como hasta ahora
+        self._selected_theme = "light" if button is self.light_radio else "dark"
+
+    def get_selected_theme(self):
+        return self._selected_theme
+
     def apply_changes(self):
         selected_theme = self.get_selected_theme()
         self.theme_manager.set_theme(selected_theme)
@@ -753,49 +1119,38 @@ class SettingsDialog(QDialog):
             QMessageBox.No
         )
         if reply == QMessageBox.Yes:
-            self.theme_manager.reset_to_defaults()
-            self.dark_radio.setChecked(True)
-            self.color_name.setText("#007acc")
-            self.update_color_preview()
-            self.update_preview()
-            self.apply_changes()
+            with self._batch_updates():
+                self.theme_manager.reset_to_defaults()
+                self.dark_radio.setChecked(True)
+                self._selected_theme = "dark"
+                self.color_name.setText("#007acc")
             
     def accept(self):
+        if self._update_pending:
+            self._flush_accent_update()
         self.apply_changes()
         super().accept()
 
+    def done(self, result):
+        # Todos los caminos de cierre (OK, Cancel, Esc, gestor de
+        # ventanas) pasan por aquí: lo que Apply ya dejó visible queda
+        # persistido aunque el diálogo se descarte con Cancel
+        self.theme_manager.flush_settings()
+        super().done(result)
+
 
 # ==============================================================================
 # 8. THEME AWARE NAVIGATION TOOLBAR
 # ==============================================================================
 class ThemeAwareNavigationToolbar(NavigationToolbar):
-    """Toolbar de matplotlib adaptada al tema"""
+    """Toolbar de matplotlib adaptada al tema.
+
+    El estilo de sus QToolButton lo aporta la hoja de estilos global.
+    """
     def __init__(self, canvas, parent, theme_manager):
         super().__init__(canvas, parent)
         self.theme_manager = theme_manager
         self.scale = theme_manager.scale
-        self.update_style()
-        
-    def update_style(self):
-        theme = self.theme_manager.get_current_theme()
-        s = self.scale
-        self.setStyleSheet(f"""
-            QToolButton {{
-                background-color: {theme['secondary']};
-                border: {int(1*s)}px solid {theme['border']};
-                border-radius: {int(3*s)}px;
-                color: {theme['text_primary']};
-                padding: {int(4*s)}px;
-                font-size: {int(9*s)}pt;
-            }}
-            QToolButton:hover {{
-                background-color: {theme['tertiary']};
-                border: {int(1*s)}px solid {theme['accent']};
-            }}
-            QToolButton:pressed {{
-                background-color: {theme['accent']};
-            }}
-        """)
 
 
 # ==============================================================================
@@ -808,15 +1163,18 @@ class FileExplorerWidget(QWidget):
         self.parent = parent
         self.theme_manager = theme_manager
         self.scale = theme_manager.scale
-        self.history = []
+        self._sc = _scaled(self.scale)
+        # Historial de navegación acotado: deque con maxlen en vez de una
+        # lista sin límite re-copiada en cada navegación
+        self.history = deque(maxlen=128)
         self.history_index = -1
+        self._last_nav_state = None
         self.init_ui()
         
     def init_ui(self):
-        s = self.scale
         layout = QVBoxLayout(self)
         layout.setContentsMargins(0, 0, 0, 0)
-        layout.setSpacing(int(5 * s))
+        layout.setSpacing(self._sc.px5)
         
         toolbar_layout = QHBoxLayout()
         self.btn_back = self.create_tool_button("◀ Atrás", "Volver al directorio anterior")
@@ -834,16 +1192,13 @@ class FileExplorerWidget(QWidget):
         
         path_layout = QHBoxLayout()
         path_label = QLabel("Ruta:")
-        self.update_label_style(path_label)
-        
+
         self.path_edit = QLineEdit()
-        self.update_lineedit_style(self.path_edit)
         self.path_edit.setText(QDir.currentPath())
         self.path_edit.returnPressed.connect(self.on_path_edited)
-        
+
         self.btn_go = QPushButton("Ir")
-        self.btn_go.setFixedSize(int(30 * s), int(25 * s))
-        self.update_go_button_style(self.btn_go)
+        self.btn_go.setObjectName("btnGo")
         self.btn_go.clicked.connect(self.on_path_edited)
         
         path_layout.addWidget(path_label)
@@ -851,22 +1206,17 @@ class FileExplorerWidget(QWidget):
         path_layout.addWidget(self.btn_go)
         
         self.tree_view = QTreeView()
-        self.model = QFileSystemModel()
-        self.model.setRootPath(QDir.rootPath())
-        self.model.setNameFilters(["*.fits", "*.fit"])
-        self.model.setNameFilterDisables(False)
-        
+        self.model = self._create_model()
+        # Raíz perezosa: enumerar solo el directorio actual, no todo "/"
+        self.model.setRootPath(QDir.currentPath())
+
         self.tree_view.setModel(self.model)
         self.tree_view.setRootIndex(self.model.index(QDir.currentPath()))
         self.tree_view.setAnimated(False)
-        self.tree_view.setIndentation(int(20 * s))
+        self.tree_view.setIndentation(self._sc.px20)
         self.tree_view.setSortingEnabled(True)
-        self.tree_view.hideColumn(1)
-        self.tree_view.hideColumn(2)
-        self.tree_view.hideColumn(3)
-        
-        self.update_treeview_style()
-        
+        self._hide_detail_columns()
+
         self.tree_view.doubleClicked.connect(self.on_file_double_clicked)
         self.tree_view.clicked.connect(self.on_tree_selection_changed)
         self.btn_back.clicked.connect(self.go_back)
@@ -881,127 +1231,30 @@ class FileExplorerWidget(QWidget):
         layout.addLayout(path_layout)
         layout.addWidget(self.tree_view)
     
+    def _create_model(self):
+        # Sin watchers por directorio ni resolución de symlinks: menos
+        # stat() por entrada al poblar directorios grandes de FITS
+        model = QFileSystemModel()
+        model.setOption(QFileSystemModel.DontWatchForChanges, True)
+        model.setOption(QFileSystemModel.DontResolveSymlinks, True)
+        model.setNameFilters(["*.fits", "*.fit"])
+        model.setNameFilterDisables(False)
+        return model
+
+    def _hide_detail_columns(self):
+        self.tree_view.hideColumn(1)
+        self.tree_view.hideColumn(2)
+        self.tree_view.hideColumn(3)
+
     def create_tool_button(self, text, tooltip):
-        s = self.scale
+        # La altura viene de la hoja global (FileExplorerWidget QPushButton):
+        # ninguna llamada de geometría por botón
         btn = QPushButton(text)
         btn.setToolTip(tooltip)
-        btn.setFixedHeight(int(28 * s))
-        self.update_button_style(btn)
         return btn
-    
-    def update_style(self):
-        for btn in [self.btn_back, self.btn_forward, self.btn_up, self.btn_home, self.btn_refresh]:
-            self.update_button_style(btn)
-        self.update_go_button_style(self.btn_go)
-        self.update_lineedit_style(self.path_edit)
-        self.update_treeview_style()
-        for label in self.findChildren(QLabel):
-            self.update_label_style(label)
-
-    def update_button_style(self, button):
-        s = self.scale
-        if self.theme_manager:
-            theme = self.theme_manager.get_current_theme()
-            button.setStyleSheet(f"""
-                QPushButton {{
-                    background-color: {theme['secondary']};
-                    border: {int(1*s)}px solid {theme['border']};
-                    border-radius: {int(3*s)}px;
-                    color: {theme['text_primary']};
-                    font-weight: bold;
-                    font-size: {int(11*s)}pt;
-                    padding: {int(4*s)}px {int(8*s)}px;
-                    min-width: {int(60*s)}px;
-                }}
-                QPushButton:hover {{
-                    background-color: {theme['tertiary']};
-                    border: {int(1*s)}px solid {theme['accent']};
-                }}
-                QPushButton:pressed {{
-                    background-color: {theme['accent']};
-                }}
-                QPushButton:disabled {{
-                    background-color: {theme['primary']};
-                    color: {theme['text_muted']};
-                    border: {int(1*s)}px solid {theme['border']};
-                }}
-            """)
-            
-    def update_label_style(self, label):
-        s = self.scale
-        if self.theme_manager:
-            theme = self.theme_manager.get_current_theme()
-            label.setStyleSheet(f"color: {theme['text_secondary']}; font-size: {int(10*s)}pt;")
-            
-    def update_lineedit_style(self, line_edit):
-        s = self.scale
-        if self.theme_manager:
-            theme = self.theme_manager.get_current_theme()
-            line_edit.setStyleSheet(f"""
-                QLineEdit {{
-                    background-color: {theme['primary']};
-                    border: {int(1*s)}px solid {theme['border']};
-                    border-radius: {int(3*s)}px;
-                    padding: {int(4*s)}px {int(8*s)}px;
-                    color: {theme['text_secondary']};
-                    font-family: 'Consolas', 'Monaco', monospace;
-                    font-size: {int(10*s)}pt;
-                    selection-background-color: {theme['accent']};
-                }}
-                QLineEdit:focus {{
-                    border: {int(1*s)}px solid {theme['accent']};
-                }}
-            """)
-            
-    def update_go_button_style(self, button):
-        s = self.scale
-        if self.theme_manager:
-            theme = self.theme_manager.get_current_theme()
-            button.setStyleSheet(f"""
-                QPushButton {{
-                    background-color: {theme['accent']};
-                    border: {int(1*s)}px solid {theme['accent']};
-                    border-radius: {int(3*s)}px;
-                    color: #ffffff;
-                    font-weight: bold;
-                    font-size: {int(9*s)}pt;
-                }}
-                QPushButton:hover {{
-                    background-color: {theme['accent_hover']};
-                }}
-                QPushButton:pressed {{
-                    background-color: {theme['accent_pressed']};
-                }}
-            """)
-            
-    def update_treeview_style(self):
-        s = self.scale
-        if self.theme_manager:
-            theme = self.theme_manager.get_current_theme()
-            self.tree_view.setStyleSheet(f"""
-                QTreeView {{
-                    background-color: {theme['primary']};
-                    border: {int(1*s)}px solid {theme['border']};
-                    border-radius: {int(4*s)}px;
-                    color: {theme['text_secondary']};
-                    outline: none;
-                    font-size: {int(10*s)}pt;
-                }}
-                QTreeView::item {{
-                    padding: {int(4*s)}px;
-                    border: none;
-                }}
-                QTreeView::item:selected {{
-                    background-color: {theme['accent']};
-                    color: #ffffff;
-                }}
-                QTreeView::item:hover {{
-                    background-color: {theme['tertiary']};
-                }}
-            """)
-        
+
     def on_path_edited(self):
-        path = self.path_edit.text().strip().replace('\\', '/')
+        path = self.path_edit.text().strip().translate(_PATH_TRANS)
         if os.path.exists(path):
             if os.path.isdir(path):
                 self.set_path(path)
@@ -1024,15 +1277,28 @@ class FileExplorerWidget(QWidget):
             self.path_edit.setText(path)
         
     def add_to_history(self, path):
-        if self.history_index < len(self.history) - 1:
-            self.history = self.history[:self.history_index + 1]
-        self.history.append(path)
+        # Descartar el futuro tras navegar desde un punto intermedio y
+        # evitar duplicados consecutivos, todo O(1) amortizado
+        while len(self.history) > self.history_index + 1:
+            self.history.pop()
+        if not self.history or self.history[-1] != path:
+            self.history.append(path)
         self.history_index = len(self.history) - 1
         self.update_navigation_buttons()
         
     def update_navigation_buttons(self):
-        self.btn_back.setEnabled(self.history_index > 0)
-        self.btn_forward.setEnabled(self.history_index < len(self.history) - 1)
+        # Solo tocar los botones cuyo estado cambió: cada setEnabled
+        # dispara un repulido de estilo aunque el valor sea el mismo
+        last = self._last_nav_state
+        new = (self.history_index > 0,
+               self.history_index < len(self.history) - 1)
+        if new == last:
+            return
+        if last is None or new[0] != last[0]:
+            self.btn_back.setEnabled(new[0])
+        if last is None or new[1] != last[1]:
+            self.btn_forward.setEnabled(new[1])
+        self._last_nav_state = new
         
     def go_back(self):
         if self.history_index > 0:
@@ -1056,18 +1322,28 @@ class FileExplorerWidget(QWidget):
         self.set_path(QDir.homePath())
         
     def refresh(self):
+        # Sin watchers (DontWatchForChanges) el modelo nunca ve cambios en
+        # disco, y setRootPath con la misma ruta es un no-op documentado:
+        # recrear el modelo es la vía fiable de re-enumerar bajo demanda
         current_path = self.tree_view.rootIndex().data(QFileSystemModel.FilePathRole)
+        old_model = self.model
+        self.model = self._create_model()
         self.model.setRootPath(current_path)
+        self.tree_view.setModel(self.model)
         self.tree_view.setRootIndex(self.model.index(current_path))
+        self._hide_detail_columns()
+        old_model.deleteLater()
         
     def set_path(self, path):
+        self.model.setRootPath(path)
         self.tree_view.setRootIndex(self.model.index(path))
         self.path_edit.setText(path)
         self.add_to_history(path)
         
     def on_file_double_clicked(self, index):
         path = self.model.filePath(index)
-        if os.path.isfile(path) and path.lower().endswith(('.fits', '.fit', '.txt', '.csv')):
+        ext = os.path.splitext(path)[1].lower()
+        if ext in _SPECTRUM_EXT and os.path.isfile(path):
             if self.parent:
                 self.parent.load_fits_file(path)
         elif os.path.isdir(path):
@@ -1077,6 +1353,40 @@ class FileExplorerWidget(QWidget):
 # ==============================================================================
 # 10. PARAMETERS PANEL
 # ==============================================================================
+class SpectralLinesModel(QAbstractTableModel):
+    """Modelo de solo lectura sobre el catálogo SPECTRAL_LINES"""
+
+    _HEADERS = ("Línea", "Longitud de Onda (Å)")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = _SPECTRAL_LINES_ROWS
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else 2
+
+    def data(self, index, role=Qt.DisplayRole):
+        # Sólo DisplayRole: devolver None para el resto abarata cada pintado
+        if role != Qt.DisplayRole:
+            return None
+        return self._rows[index.row()][index.column()]
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self._HEADERS[section]
+        return None
+
+    def refresh(self):
+        # Reformatea una sola vez por refresco; data() sirve cadenas listas.
+        # El reset avisa a las vistas aunque cambie el número de filas.
+        self.beginResetModel()
+        self._rows = tuple((k, str(v)) for k, v in SPECTRAL_LINES.items())
+        self.endResetModel()
+
+
 class ParametersPanel(QWidget):
     """Panel de parámetros optimizado con StyleEngine"""
     def __init__(self, parent=None, theme_manager=None):
@@ -1084,32 +1394,52 @@ class ParametersPanel(QWidget):
         self.parent = parent
         self.theme_manager = theme_manager
         self.scale = theme_manager.scale
-        self.current_params = DEFAULT_PARAMS.copy()
+        self._sc = _scaled(self.scale)
+        # Dict compartido con la ventana principal: se muta in situ, sin
+        # copiarlo entero en cada cambio de parámetro
+        if parent is not None:
+            self.current_params = parent.current_params
+        else:
+            self.current_params = DEFAULT_PARAMS.copy()
+        # Conversor por parámetro resuelto una sola vez (bool necesita trato
+        # especial porque bool("False") es True)
+        self._converters = {
+            key: (lambda text: text == "True") if isinstance(value, bool) else type(value)
+            for key, value in self.current_params.items()
+        }
         self.init_ui()
         
     def init_ui(self):
-        s = self.scale
         main_layout = QVBoxLayout(self)
-        main_layout.setSpacing(int(10 * s))
+        main_layout.setSpacing(self._sc.px10)
         main_layout.setContentsMargins(5, 5, 5, 5)
-        
-        scroll_area = QScrollArea()
-        scroll_area.setWidgetResizable(True)
-        scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
-        scroll_area.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
-        self.update_scrollarea_style(scroll_area)
-        
+
+        self._scroll_area = QScrollArea()
+        self._scroll_area.setWidgetResizable(True)
+        self._scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
+        self._scroll_area.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
+        main_layout.addWidget(self._scroll_area)
+
+        self.comboboxes = {}
+        self.lines_model = None
+        # Aplazar el montaje del contenido al siguiente ciclo del bucle de
+        # eventos: la ventana pinta su esqueleto sin esperar a los combos
+        QTimer.singleShot(0, self._populate)
+
+    def _populate(self):
+        sc = self._sc
+        # Un solo repintado al final de la creación masiva de widgets
+        self.setUpdatesEnabled(False)
         scroll_widget = QWidget()
-        self.update_widget_style(scroll_widget)
+        scroll_widget.setObjectName("paramsScrollWidget")
         scroll_layout = QVBoxLayout(scroll_widget)
-        scroll_layout.setSpacing(int(10 * s))
+        scroll_layout.setSpacing(sc.px10)
         scroll_layout.setContentsMargins(5, 5, 5, 5)
-        
+
         params_group = QGroupBox("Parámetros de Procesamiento")
-        self.update_groupbox_style(params_group)
         params_layout = QGridLayout(params_group)
-        params_layout.setVerticalSpacing(int(8 * s))
-        params_layout.setHorizontalSpacing(int(10 * s))
+        params_layout.setVerticalSpacing(sc.px8)
+        params_layout.setHorizontalSpacing(sc.px10)
         
         param_options = {
             "REBIN_FACTOR": ["2", "4", "6", "8", "10"],
@@ -1123,33 +1453,31 @@ class ParametersPanel(QWidget):
             "REDSHIFT_SIGMA_CLIP": ["1.5", "2.0", "2.5", "3.0", "3.5"]
         }
         
-        self.comboboxes = {}
         row = 0
         for key, value in self.current_params.items():
             label = QLabel(key)
-            self.update_label_style(label)
             label.setToolTip(f"Parámetro: {key}")
-            
+
             combo = QComboBox()
             combo.setToolTip(f"Seleccione un valor para {key}")
-            combo.setMinimumHeight(int(25 * s))
-            self.update_combobox_style(combo)
-            
-            if key in param_options:
-                combo.addItems(param_options[key])
-            else:
-                combo.addItem(str(value))
-            
+            combo.setMinimumHeight(sc.px25)
+
+            # Índice resuelto en Python sobre la lista de opciones: sin el
+            # barrido lineal de findText a través del puente C++
             current_value = str(value)
-            index = combo.findText(current_value)
-            if index >= 0:
-                combo.setCurrentIndex(index)
-            else:
-                combo.addItem(current_value)
-                combo.setCurrentText(current_value)
-            
-            combo.currentTextChanged.connect(lambda text, param=key: self.on_parameter_changed(param, text))
-            
+            options = param_options.get(key, [current_value])
+            if current_value not in options:
+                options = options + [current_value]
+            combo.addItems(options)
+            combo.setCurrentIndex(options.index(current_value))
+
+
+            # Un único slot compartido: el nombre del parámetro viaja como
+            # propiedad dinámica del combo en vez de en una lambda por widget
+            combo.setProperty("param_name", key)
+            combo.currentTextChanged.connect(self._on_combo_changed)
+
+
             params_layout.addWidget(label, row, 0)
             params_layout.addWidget(combo, row, 1)
             self.comboboxes[key] = combo
@@ -1158,86 +1486,39 @@ class ParametersPanel(QWidget):
         params_layout.setColumnStretch(1, 1)
         
         lines_group = QGroupBox("Líneas Espectrales de Referencia")
-        self.update_groupbox_style(lines_group)
         lines_layout = QVBoxLayout(lines_group)
         
-        self.lines_table = QTableWidget()
-        self.lines_table.setColumnCount(2)
-        self.lines_table.setHorizontalHeaderLabels(["Línea", "Longitud de Onda (Å)"])
+        # Vista sobre un modelo ligero: sin QTableWidgetItem por celda y con
+        # alto de fila fijo para evitar la pasada de medición de Qt
+        self.lines_model = SpectralLinesModel(self)
+        self.lines_table = QTableView()
+        self.lines_table.setModel(self.lines_model)
         self.lines_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self.lines_table.setEditTriggers(QTableWidget.NoEditTriggers)
-        self.lines_table.setMaximumHeight(int(150 * s))
-        
-        self.update_table_style(self.lines_table)
-        self.update_spectral_lines_table()
-        
+        self.lines_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.lines_table.verticalHeader().setDefaultSectionSize(sc.px24)
+        self.lines_table.setMaximumHeight(sc.px150)
+
         lines_layout.addWidget(self.lines_table)
         
         scroll_layout.addWidget(params_group)
         scroll_layout.addWidget(lines_group)
         scroll_layout.addStretch(1)
-        
-        scroll_area.setWidget(scroll_widget)
-        main_layout.addWidget(scroll_area)
-    
-    def update_style(self):
-        theme = self.theme_manager.get_current_theme()
-        s = self.scale
-        self.update_scrollarea_style(self.findChild(QScrollArea))
-        for group in self.findChildren(QGroupBox):
-            group.setStyleSheet(StyleEngine.get_groupbox_style(theme, s))
-        for label in self.findChildren(QLabel):
-            label.setStyleSheet(StyleEngine.get_label_style(theme, s))
-        for combo in self.findChildren(QComboBox):
-            combo.setStyleSheet(StyleEngine.get_combobox_style(theme, s))
-        self.update_table_style(self.lines_table)
-
-    def update_widget_style(self, widget):
-        theme = self.theme_manager.get_current_theme()
-        widget.setStyleSheet(f"background-color: {theme['secondary']};")
-
-    def update_groupbox_style(self, groupbox):
-        theme = self.theme_manager.get_current_theme()
-        groupbox.setStyleSheet(StyleEngine.get_groupbox_style(theme, self.scale))
 
-    def update_label_style(self, label):
-        theme = self.theme_manager.get_current_theme()
-        label.setStyleSheet(StyleEngine.get_label_style(theme, self.scale))
+        self._scroll_area.setWidget(scroll_widget)
+        self.setUpdatesEnabled(True)
 
-    def update_combobox_style(self, combobox):
-        theme = self.theme_manager.get_current_theme()
-        combobox.setStyleSheet(StyleEngine.get_combobox_style(theme, self.scale))
+    def _on_combo_changed(self, text):
+        self.on_parameter_changed(self.sender().property("param_name"), text)
 
-    def update_table_style(self, table):
-        theme = self.theme_manager.get_current_theme()
-        table.setStyleSheet(StyleEngine.get_table_style(theme, self.scale))
-
-    def update_scrollarea_style(self, scroll_area):
-        theme = self.theme_manager.get_current_theme()
-        scroll_area.setStyleSheet(StyleEngine.get_scrollarea_style(theme, self.scale))
-        
     def on_parameter_changed(self, param_name, new_value):
         try:
-            original_value = self.current_params[param_name]
-            if isinstance(original_value, bool):
-                self.current_params[param_name] = (new_value == "True")
-            elif isinstance(original_value, int):
-                self.current_params[param_name] = int(new_value)
-            elif isinstance(original_value, float):
-                self.current_params[param_name] = float(new_value)
-            else:
-                self.current_params[param_name] = new_value
-            if self.parent:
-                self.parent.current_params = self.current_params.copy()
-        except ValueError as e:
+            self.current_params[param_name] = self._converters[param_name](new_value)
+        except (KeyError, ValueError) as e:
             print(f"Error al convertir valor para {param_name}: {e}")
 
     def update_spectral_lines_table(self):
-        lines = SPECTRAL_LINES
-        self.lines_table.setRowCount(len(lines))
-        for i, (key, value) in enumerate(lines.items()):
-            self.lines_table.setItem(i, 0, QTableWidgetItem(key))
-            self.lines_table.setItem(i, 1, QTableWidgetItem(str(value)))
+        if self.lines_model is not None:
+            self.lines_model.refresh()
 
 
 # ==============================================================================
@@ -1248,38 +1529,333 @@ class MplCanvas(FigureCanvas):
     def __init__(self, parent=None, width=8, height=6, dpi=100, theme_manager=None):
         self.theme_manager = theme_manager
         self.scale = theme_manager.scale
-        if theme_manager and theme_manager.current_theme_name == "light":
-            plt.style.use('default')
-        else:
-            plt.style.use('dark_background')
-        self.fig, self.ax = plt.subplots(1, 1, figsize=(width, height), dpi=dpi)
+        self._sc = _scaled(self.scale)
+        # Figure directa en vez de plt.subplots: sin mutar rcParams globales
+        # con plt.style.use y sin registrar la figura en el estado de pyplot.
+        # update_plot_theme ya aplica todos los colores del tema.
+        self.fig = Figure(figsize=(width, height), dpi=dpi)
+        self.ax = self.fig.add_subplot(111)
+        # Artistas persistentes: plot_spectrum solo actualiza sus datos en vez
+        # de reconstruir la figura con ax.clear() en cada análisis
+        self.line_orig, = self.ax.plot([], [], alpha=0.6, linewidth=0.5, antialiased=False, label="Original")
+        self.line_proc, = self.ax.plot([], [], linewidth=1, label="Procesado")
+        self.line_markers = []
+        self._last_applied_theme = None
         self.update_plot_theme()
         super(MplCanvas, self).__init__(self.fig)
         self.setParent(parent)
+        # Blitting: la curva procesada se marca como animada para excluirla
+        # del render completo; tras cada draw se cachea el fondo (ejes,
+        # curva original y marcas) y la curva se dibuja encima con blit.
+        # Un resize o draw_idle regenera el fondo automáticamente.
+        self.line_proc.set_animated(True)
+        self._background = None
+        self._layout_done = False
+        self.mpl_connect('draw_event', self._on_draw)
+
+    def _on_draw(self, event):
+        self._background = self.copy_from_bbox(self.ax.bbox)
+        self.ax.draw_artist(self.line_proc)
+        self.blit(self.ax.bbox)
+
+    def blit_processed(self):
+        """Redibuja solo la curva procesada sobre el fondo cacheado"""
+        self.restore_region(self._background)
+        self.ax.draw_artist(self.line_proc)
+        self.blit(self.ax.bbox)
+
+    def clear_line_markers(self):
+        """Elimina las marcas de líneas espectrales del análisis anterior"""
+        for artist in self.line_markers:
+            artist.remove()
+        self.line_markers.clear()
         
     def update_plot_theme(self):
         if self.theme_manager:
+            # Reaplicar el mismo tema sería mutar todos los artistas (y
+            # redibujar) para dejar los colores exactamente igual
+            key = (self.theme_manager.current_theme_name,
+                   self.theme_manager.custom_accent, self.scale)
+            if key == self._last_applied_theme:
+                return
+            self._last_applied_theme = key
             theme = self.theme_manager.get_current_theme()
-            s = self.scale
+            ax = self.ax
+            text_secondary = theme['text_secondary']
+            border = theme['border']
+            fontsize_labels = self._sc.pt10
+            fontsize_title = self._sc.pt12
+            fontsize_ticks = self._sc.px8
+            # Mutaciones agrupadas con setp: una llamada por familia de
+            # artistas en lugar de un setter (y su invalidación) por atributo
             self.fig.patch.set_facecolor(theme['primary'])
-            self.ax.set_facecolor(theme['secondary'])
-            fontsize_labels = int(10 * s)
-            fontsize_title = int(12 * s)
-            fontsize_ticks = int(8 * s)
-            self.ax.tick_params(colors=theme['text_secondary'], labelsize=fontsize_ticks)
-            for spine in self.ax.spines.values():
-                spine.set_color(theme['border'])
-            self.ax.title.set_color(theme['text_primary'])
-            self.ax.title.set_fontsize(fontsize_title)
-            self.ax.xaxis.label.set_color(theme['text_secondary'])
-            self.ax.yaxis.label.set_color(theme['text_secondary'])
-            self.ax.xaxis.label.set_fontsize(fontsize_labels)
-            self.ax.yaxis.label.set_fontsize(fontsize_labels)
-            legend = self.ax.get_legend()
+            ax.set_facecolor(theme['secondary'])
+            ax.tick_params(colors=text_secondary, labelsize=fontsize_ticks)
+            setp(list(ax.spines.values()), color=border)
+            ax.title.set(color=theme['text_primary'], fontsize=fontsize_title)
+            setp((ax.xaxis.label, ax.yaxis.label),
+                 color=text_secondary, fontsize=fontsize_labels)
+            legend = ax.get_legend()
             if legend:
-                for text in legend.get_texts():
-                    text.set_fontsize(fontsize_ticks)
-            self.ax.grid(True, alpha=0.2, color=theme['border'])
+                setp(legend.get_texts(), fontsize=fontsize_ticks)
+            ax.grid(True, alpha=0.2, color=border)
+            # Un único redibujado diferido; en __init__ el canvas aún no
+            # está conectado a la figura y el draw inicial ya lo cubre
+            canvas = self.fig.canvas
+            if canvas is not None:
+                canvas.draw_idle()
+
+
+def _minmax_decimate(x, y, n_out):
+    """Diezma (x, y) a ~2*n_out puntos conservando el par (min, max) de cada
+    columna de píxel, de modo que el trazo diezmado cubre la misma envolvente
+    visual que el espectro completo."""
+    bucket = len(y) // n_out
+    if bucket < 2:
+        return x, y
+    n = n_out * bucket
+    yb = y[:n].reshape(n_out, bucket)
+    y_out = np.empty(2 * n_out, dtype=np.float64)
+    y_out[0::2] = yb.min(axis=1)
+    y_out[1::2] = yb.max(axis=1)
+    x_out = np.repeat(x[:n].reshape(n_out, bucket)[:, bucket // 2], 2)
+    return x_out, y_out
+
+
+@functools.lru_cache(maxsize=8)
+def _build_app_stylesheet(theme_items, scale):
+    """Construye la hoja de estilos completa de la aplicación.
+
+    Todos los estilos por-widget se expresan con selectores de clase y
+    objectName para que un cambio de tema sea un único parse. El resultado
+    se memoiza por (tema, escala): re-aplicar un tema ya construido no
+    vuelve a formatear ninguna cadena.
+    """
+    theme = dict(theme_items)
+    s = scale
+    # Cada tamaño en píxeles se convierte una sola vez por escala
+    sc = _scaled(s)
+    base = f"""
+        QMainWindow {{
+            background-color: {theme['primary']};
+            color: {theme['text_primary']};
+        }}
+        QGroupBox {{
+            font-weight: bold;
+            border: {sc.px2}px solid {theme['border']};
+            border-radius: {sc.px5}px;
+            margin-top: 1ex;
+            padding-top: {sc.px10}px;
+            background-color: {theme['secondary']};
+            color: {theme['text_primary']};
+        }}
+        QGroupBox::title {{
+            subcontrol-origin: margin;
+            left: {sc.px10}px;
+            padding: 0 5px 0 5px;
+            color: {theme['accent']};
+        }}
+        QPushButton {{
+            background-color: {theme['accent']};
+            color: white;
+            border: none;
+            border-radius: {sc.px4}px;
+            padding: {sc.px8}px {sc.px16}px;
+            font-weight: bold;
+            min-height: {sc.px20}px;
+        }}
+        QPushButton:hover {{
+            background-color: {theme['accent_hover']};
+        }}
+        QPushButton:pressed {{
+            background-color: {theme['accent_pressed']};
+        }}
+        QPushButton:disabled {{
+            background-color: {theme['border']};
+            color: {theme['text_muted']};
+        }}
+        QLabel {{
+            color: {theme['text_secondary']};
+            padding: {sc.px4}px;
+        }}
+        QProgressBar {{
+            border: {sc.px1}px solid {theme['border']};
+            border-radius: {sc.px4}px;
+            text-align: center;
+            color: {theme['text_primary']};
+            background-color: {theme['secondary']};
+        }}
+        QProgressBar::chunk {{
+            background-color: {theme['accent']};
+            border-radius: {sc.px3}px;
+        }}
+        QTextEdit {{
+            background-color: {theme['primary']};
+            color: {theme['text_secondary']};
+            border: {sc.px1}px solid {theme['border']};
+            border-radius: {sc.px4}px;
+            padding: {sc.px8}px;
+            font-family: 'Consolas', 'Monaco', monospace;
+        }}
+        QMenuBar {{
+            background-color: {theme['secondary']};
+            color: {theme['text_primary']};
+            border-bottom: {sc.px1}px solid {theme['border']};
+        }}
+        QMenuBar::item {{
+            background-color: transparent;
+            padding: {sc.px4}px {sc.px8}px;
+        }}
+        QMenuBar::item:selected {{
+            background-color: {theme['tertiary']};
+        }}
+        QMenu {{
+            background-color: {theme['secondary']};
+            color: {theme['text_primary']};
+            border: {sc.px1}px solid {theme['border']};
+        }}
+        QMenu::item {{
+            padding: {sc.px4}px {sc.px16}px;
+        }}
+        QMenu::item:selected {{
+            background-color: {theme['accent']};
+        }}
+    """
+    widgets = f"""
+        QToolButton {{
+            background-color: {theme['secondary']};
+            border: {sc.px1}px solid {theme['border']};
+            border-radius: {sc.px3}px;
+            color: {theme['text_primary']};
+            padding: {sc.px4}px;
+            font-size: {sc.px9}pt;
+        }}
+        QToolButton:hover {{
+            background-color: {theme['tertiary']};
+            border: {sc.px1}px solid {theme['accent']};
+        }}
+        QToolButton:pressed {{
+            background-color: {theme['accent']};
+        }}
+        QLineEdit {{
+            background-color: {theme['primary']};
+            border: {sc.px1}px solid {theme['border']};
+            border-radius: {sc.px3}px;
+            padding: {sc.px4}px {sc.px8}px;
+            color: {theme['text_secondary']};
+            font-family: 'Consolas', 'Monaco', monospace;
+            font-size: {sc.px10}pt;
+            selection-background-color: {theme['accent']};
+        }}
+        QLineEdit:focus {{
+            border: {sc.px1}px solid {theme['accent']};
+        }}
+        QTreeView {{
+            background-color: {theme['primary']};
+            border: {sc.px1}px solid {theme['border']};
+            border-radius: {sc.px4}px;
+            color: {theme['text_secondary']};
+            outline: none;
+            font-size: {sc.px10}pt;
+        }}
+        QTreeView::item {{
+            padding: {sc.px4}px;
+            border: none;
+        }}
+        QTreeView::item:selected {{
+            background-color: {theme['accent']};
+            color: #ffffff;
+        }}
+        QTreeView::item:hover {{
+            background-color: {theme['tertiary']};
+        }}
+        FileExplorerWidget QLabel {{
+            color: {theme['text_secondary']};
+            font-size: {sc.px10}pt;
+        }}
+        FileExplorerWidget QPushButton {{
+            background-color: {theme['secondary']};
+            border: {sc.px1}px solid {theme['border']};
+            border-radius: {sc.px3}px;
+            color: {theme['text_primary']};
+            font-weight: bold;
+            font-size: {sc.px11}pt;
+            padding: {sc.px4}px {sc.px8}px;
+            min-width: {sc.px60}px;
+            min-height: {sc.px28}px;
+            max-height: {sc.px28}px;
+        }}
+        FileExplorerWidget QPushButton:hover {{
+            background-color: {theme['tertiary']};
+            border: {sc.px1}px solid {theme['accent']};
+        }}
+        FileExplorerWidget QPushButton:pressed {{
+            background-color: {theme['accent']};
+        }}
+        FileExplorerWidget QPushButton:disabled {{
+            background-color: {theme['primary']};
+            color: {theme['text_muted']};
+            border: {sc.px1}px solid {theme['border']};
+        }}
+        FileExplorerWidget QPushButton#btnGo {{
+            background-color: {theme['accent']};
+            border: {sc.px1}px solid {theme['accent']};
+            border-radius: {sc.px3}px;
+            color: #ffffff;
+            font-weight: bold;
+            font-size: {sc.px9}pt;
+            min-width: {sc.px30}px;
+            max-width: {sc.px30}px;
+            min-height: {sc.px25}px;
+            max-height: {sc.px25}px;
+            padding: 0px;
+        }}
+        FileExplorerWidget QPushButton#btnGo:hover {{
+            background-color: {theme['accent_hover']};
+        }}
+        FileExplorerWidget QPushButton#btnGo:pressed {{
+            background-color: {theme['accent_pressed']};
+        }}
+        ParametersPanel QLabel {{
+            color: {theme['text_secondary']};
+            font-weight: bold;
+            font-size: {StyleEngine._pt(10, s)}pt;
+        }}
+        ParametersPanel QGroupBox {{
+            font-size: {StyleEngine._pt(11, s)}pt;
+        }}
+        QWidget#paramsScrollWidget {{
+            background-color: {theme['secondary']};
+        }}
+        LoggerWidget {{
+            background-color: {theme['primary']};
+            color: #00ff00;
+            border: {sc.px1}px solid {theme['border']};
+            border-radius: {sc.px4}px;
+            padding: {sc.px5}px;
+            font-family: 'Consolas', 'Courier New', monospace;
+            font-size: {sc.px9}pt;
+        }}
+        QLabel#fileLabel {{
+            background-color: {theme['primary']};
+            border: {sc.px1}px solid {theme['border']};
+            border-radius: {sc.px4}px;
+            padding: {sc.px8}px;
+            color: {theme['text_muted']};
+            min-height: {sc.px60}px;
+        }}
+        QLabel#fileLabel[fileLoaded="true"] {{
+            border: {sc.px1}px solid {theme['accent']};
+            color: {theme['text_primary']};
+        }}
+    """
+    return "\n".join([
+        base,
+        StyleEngine.get_combobox_style(theme, s),
+        StyleEngine.get_table_style(theme, s),
+        StyleEngine.get_scrollarea_style(theme, s),
+        widgets,
+    ])
 
 
 # ==============================================================================
@@ -1292,13 +1868,18 @@ class MainWindow(QMainWindow):
         self.setWindowTitle("LAMOST Spectrum Analyzer")
         self.theme_manager = ThemeManager()
         self.file_path = None
-        self.wl = None
-        self.flux = None
-        self.ivar = None
+        self._file_basename = None
         self.report = None
         self.current_params = DEFAULT_PARAMS.copy()
         self.source_type = "LAMOST"
         self.scale = self.theme_manager.scale
+        self._settings_dialog = None
+        self._analysis_thread = None
+        self._analysis_worker = None
+        # Widgets que necesitan refrescarse en cada cambio de tema; init_ui
+        # los registra explícitamente en vez de sondear con hasattr
+        self._theme_subscribers = []
+        self._applied_theme = None
 
         # --- INICIALIZACIÓN DEL LOGGER ---
         self.logger = LoggerWidget(self.theme_manager, self.scale)
@@ -1320,126 +1901,29 @@ class MainWindow(QMainWindow):
         self.apply_theme()
         
     def apply_theme(self):
-        theme = self.theme_manager.get_current_theme()
-        palette = QPalette()
-        palette.setColor(QPalette.Window, QColor(theme['primary']))
-        palette.setColor(QPalette.WindowText, QColor(theme['text_primary']))
-        palette.setColor(QPalette.Base, QColor(theme['primary']))
-        palette.setColor(QPalette.AlternateBase, QColor(theme['secondary']))
-        palette.setColor(QPalette.ToolTipBase, QColor(theme['text_primary']))
-        palette.setColor(QPalette.ToolTipText, QColor(theme['text_primary']))
-        palette.setColor(QPalette.Text, QColor(theme['text_primary']))
-        palette.setColor(QPalette.Button, QColor(theme['secondary']))
-        palette.setColor(QPalette.ButtonText, QColor(theme['text_primary']))
-        palette.setColor(QPalette.BrightText, Qt.red)
-        palette.setColor(QPalette.Link, QColor(theme['accent']))
-        palette.setColor(QPalette.Highlight, QColor(theme['accent']))
-        palette.setColor(QPalette.HighlightedText, QColor(theme['secondary']))
-        self.setPalette(palette)
-        self.setStyleSheet(self.get_main_stylesheet())
-        if hasattr(self, 'file_explorer'):
-            self.file_explorer.update_style()
-        if hasattr(self, 'parameters_panel'):
-            self.parameters_panel.update_style()
-        if hasattr(self, 'toolbar'):
-            self.toolbar.update_style()
-        if hasattr(self, 'canvas'):
-            self.canvas.update_plot_theme()
-            self.canvas.draw()
-        self.update_file_label_style()
+        """Aplica el tema con una única hoja de estilos a nivel de aplicación.
+
+        Un solo setStyleSheet global evita que Qt re-parsee y re-pula cada
+        widget por separado como hacían los antiguos update_*_style.
+        """
+        applied = (self.theme_manager.current_theme_name, self.theme_manager.custom_accent)
+        if applied == self._applied_theme:
+            return
+        self._applied_theme = applied
+        # Paleta a nivel de aplicación: los widgets "solo color" (labels,
+        # frames) heredan los roles sin pasar por el parser de QSS
+        app = QApplication.instance()
+        app.setPalette(self.theme_manager.get_palette())
+        app.setStyleSheet(self.get_main_stylesheet())
+        for callback in self._theme_subscribers:
+            callback()
+        self.canvas.draw_idle()
         self.update()
-        QApplication.processEvents()
         
     def get_main_stylesheet(self):
         theme = self.theme_manager.get_current_theme()
-        s = self.scale
-        return f"""
-            QMainWindow {{
-                background-color: {theme['primary']};
-                color: {theme['text_primary']};
-            }}
-            QGroupBox {{
-                font-weight: bold;
-                border: {int(2 * s)}px solid {theme['border']};
-                border-radius: {int(5 * s)}px;
-                margin-top: 1ex;
-                padding-top: {int(10 * s)}px;
-                background-color: {theme['secondary']};
-                color: {theme['text_primary']};
-            }}
-            QGroupBox::title {{
-                subcontrol-origin: margin;
-                left: {int(10 * s)}px;
-                padding: 0 5px 0 5px;
-                color: {theme['accent']};
-            }}
-            QPushButton {{
-                background-color: {theme['accent']};
-                color: white;
-                border: none;
-                border-radius: {int(4 * s)}px;
-                padding: {int(8 * s)}px {int(16 * s)}px;
-                font-weight: bold;
-                min-height: {int(20 * s)}px;
-            }}
-            QPushButton:hover {{
-                background-color: {theme['accent_hover']};
-            }}
-            QPushButton:pressed {{
-                background-color: {theme['accent_pressed']};
-            }}
-            QPushButton:disabled {{
-                background-color: {theme['border']};
-                color: {theme['text_muted']};
-            }}
-            QLabel {{
-                color: {theme['text_secondary']};
-                padding: {int(4 * s)}px;
-            }}
-            QProgressBar {{
-                border: {int(1 * s)}px solid {theme['border']};
-                border-radius: {int(4 * s)}px;
-                text-align: center;
-                color: {theme['text_primary']};
-                background-color: {theme['secondary']};
-            }}
-            QProgressBar::chunk {{
-                background-color: {theme['accent']};
-                border-radius: {int(3 * s)}px;
-            }}
-            QTextEdit {{
-                background-color: {theme['primary']};
-                color: {theme['text_secondary']};
-                border: {int(1 * s)}px solid {theme['border']};
-                border-radius: {int(4 * s)}px;
-                padding: {int(8 * s)}px;
-                font-family: 'Consolas', 'Monaco', monospace;
-            }}
-            QMenuBar {{
-                background-color: {theme['secondary']};
-                color: {theme['text_primary']};
-                border-bottom: {int(1 * s)}px solid {theme['border']};
-            }}
-            QMenuBar::item {{
-                background-color: transparent;
-                padding: {int(4 * s)}px {int(8 * s)}px;
-            }}
-            QMenuBar::item:selected {{
-                background-color: {theme['tertiary']};
-            }}
-            QMenu {{
-                background-color: {theme['secondary']};
-                color: {theme['text_primary']};
-                border: {int(1 * s)}px solid {theme['border']};
-            }}
-            QMenu::item {{
-                padding: {int(4 * s)}px {int(16 * s)}px;
-            }}
-            QMenu::item:selected {{
-                background-color: {theme['accent']};
-            }}
-        """
-        
+        return _build_app_stylesheet(tuple(sorted(theme.items())), self.scale)
+
     def init_ui(self):
         s = self.scale
         central_widget = QWidget()
@@ -1463,18 +1947,17 @@ class MainWindow(QMainWindow):
         file_info_group = QGroupBox("File Information")
         file_info_layout = QVBoxLayout(file_info_group)
         self.file_label = QLabel("No hay archivo seleccionado")
+        self.file_label.setObjectName("fileLabel")
         self.file_label.setWordWrap(True)
         file_info_layout.addWidget(self.file_label)
-        
+
         src_layout = QHBoxLayout()
         src_label = QLabel("Modo Fuente:")
-        self.update_label_style(src_label)
         src_layout.addWidget(src_label)
-        
+
         self.source_combo = QComboBox()
         self.source_combo.addItems(["LAMOST", "UNIVERSAL (FITS/TXT)"])
         self.source_combo.currentTextChanged.connect(self.set_source_type)
-        self.update_combobox_style(self.source_combo)
         src_layout.addWidget(self.source_combo)
         file_info_layout.addLayout(src_layout)
         
@@ -1507,6 +1990,7 @@ class MainWindow(QMainWindow):
         center_layout.setSpacing(int(5 * s))
         
         self.canvas = MplCanvas(self, width=10, height=6, dpi=100, theme_manager=self.theme_manager)
+        self._theme_subscribers.append(self.canvas.update_plot_theme)
         self.toolbar = ThemeAwareNavigationToolbar(self.canvas, self, self.theme_manager)
         center_layout.addWidget(self.toolbar)
         center_layout.addWidget(self.canvas)
@@ -1522,7 +2006,6 @@ class MainWindow(QMainWindow):
         
         # --- AÑADIR TERMINAL AQUÍ ---
         self.logger.setMaximumHeight(int(150 * s))
-        self.logger.apply_style()
         center_layout.addWidget(self.logger)
         # -------------------------
         
@@ -1545,81 +2028,20 @@ class MainWindow(QMainWindow):
     def set_source_type(self, text):
         self.source_type = text.split(" ")[0]
         
-    def update_file_label_style(self):
-        theme = self.theme_manager.get_current_theme()
-        s = self.scale
-        if self.file_path:
-            self.file_label.setStyleSheet(f"""
-                QLabel {{
-                    background-color: {theme['primary']};
-                    border: {int(1*s)}px solid {theme['accent']};
-                    border-radius: {int(4*s)}px;
-                    padding: {int(8*s)}px;
-                    color: {theme['text_primary']};
-                    min-height: {int(60*s)}px;
-                }}
-            """)
-        else:
-            self.file_label.setStyleSheet(f"""
-                QLabel {{
-                    background-color: {theme['primary']};
-                    border: {int(1*s)}px solid {theme['border']};
-                    border-radius: {int(4*s)}px;
-                    padding: {int(8*s)}px;
-                    color: {theme['text_muted']};
-                    min-height: {int(60*s)}px;
-                }}
-            """)
-            
-    def update_label_style(self, label):
-        s = self.scale
-        if self.theme_manager:
-            theme = self.theme_manager.get_current_theme()
-            label.setStyleSheet(f"color: {theme['text_secondary']}; font-size: {int(10*s)}pt;")
+    def _set_file_label_loaded(self, loaded):
+        """Cambia la variante visual del fileLabel vía propiedad dinámica QSS"""
+        self.file_label.setProperty("fileLoaded", "true" if loaded else "false")
+        style = self.file_label.style()
+        style.unpolish(self.file_label)
+        style.polish(self.file_label)
 
-    def update_combobox_style(self, combobox):
-        s = self.scale
-        if self.theme_manager:
-            theme = self.theme_manager.get_current_theme()
-            combobox.setStyleSheet(f"""
-                QComboBox {{
-                    background-color: {theme['secondary']};
-                    border: {int(1*s)}px solid {theme['border']};
-                    border-radius: {int(3*s)}px;
-                    padding: {int(4*s)}px;
-                    color: {theme['text_secondary']};
-                    min-width: {int(80*s)}px;
-                    font-size: {int(9*s)}pt;
-                }}
-                QComboBox:focus {{
-                    border: {int(1*s)}px solid {theme['accent']};
-                }}
-                QComboBox::drop-down {{
-                    border: none;
-                    width: {int(20*s)}px;
-                }}
-                QComboBox::down-arrow {{
-                    image: none;
-                    border-left: {int(5*s)}px solid transparent;
-                    border-right: {int(5*s)}px solid transparent;
-                    border-top: {int(5*s)}px solid {theme['text_secondary']};
-                    width: 0px;
-                    height: 0px;
-                }}
-                QComboBox QAbstractItemView {{
-                    background-color: {theme['secondary']};
-                    border: {int(1*s)}px solid {theme['border']};
-                    color: {theme['text_secondary']};
-                    selection-background-color: {theme['accent']};
-                    font-size: {int(9*s)}pt;
-                }}
-            """)
-        
     def load_fits_file(self, file_path):
         self.file_path = file_path
-        filename = os.path.basename(file_path)
+        # Basename calculado una vez por carga; save_results lo reutiliza
+        self._file_basename = os.path.basename(file_path)
+        filename = self._file_basename
         self.file_label.setText(f"📁 {filename}\n📍 {file_path}")
-        self.update_file_label_style()
+        self._set_file_label_loaded(True)
         self.btn_analyze.setEnabled(True)
         self.results_text.append(f"✓ Archivo cargado: {filename}")
         
@@ -1639,108 +2061,162 @@ class MainWindow(QMainWindow):
         if not self.file_path:
             QMessageBox.warning(self, "Advertencia", "Seleccione un archivo primero.")
             return
-            
-        try:
-            self.progress_bar.setValue(10)
-            QApplication.processEvents()
-            
-            params = self.current_params
-            lines_dict = SPECTRAL_LINES
-            
-            # --- LÓGICA MODIFICADA PARA SOPORTAR UNIVERSAL ---
-            if self.source_type == "LAMOST":
-                # CÓDIGO ORIGINAL LAMOST
-                self.wl, self.flux, self.ivar = read_fits_file(self.file_path)
-                self.progress_bar.setValue(30)
-                
-                m = valid_mask(self.flux, self.ivar)
-                self.wl, self.flux, self.ivar = self.wl[m], self.flux[m], self.ivar[m]
-
-                wl_r, flux_r, ivar_r = rebin_spectrum(self.wl, self.flux, self.ivar, factor=params["REBIN_FACTOR"])
-                if len(flux_r) == 0:
-                    QMessageBox.critical(self, "Error", "Array vacío tras rebinado.")
-                    return
-            
-            else:
-                # NUEVO CÓDIGO UNIVERSAL
-                print("Usando cargador universal en GUI...")
-                wl, flux = load_spectrum_universal(self.file_path)
-                
-                if wl is None:
-                    QMessageBox.critical(self, "Error", "No se pudo leer el archivo en modo Universal.")
-                    return
-                
-                self.wl, self.flux = wl, flux
-                # Simulamos ivar (inverso de varianza) para que los filtros posteriores no rompan
-                self.ivar = np.ones_like(flux) * 100.0 
-                
-                # Para datos universales, asumimos que ya vienen bien calibrados y saltamos el rebinado
-                wl_r, flux_r, ivar_r = self.wl, self.flux, self.ivar
-            # ----------------------------------------------
-
-            current_sg_window = params["SG_WINDOW"]
-            if params["SG_WINDOW"] > len(flux_r):
-                current_sg_window = max(3, len(flux_r)-1)
-                self.results_text.append(f"⚠ SG_WINDOW ajustado a {current_sg_window}")
+        if self._analysis_thread is not None:
+            return  # Análisis ya en curso
 
-            flux_smooth = try_savgol(flux_r, window=current_sg_window, poly=params["SG_POLY"], moving_avg_window=params["MOVING_AVG_WINDOW"])
-            flux_enhanced = enhance_line_detection(flux_smooth, enhancement_factor=1.3)
-
-            if params["DO_CONTINUUM_NORM"]:
-                cont = running_percentile(flux_enhanced, win=params["CONTINUUM_WINDOW"], q=params["CONTINUUM_PERCENTILE"])
-                cont = np.where(cont <= 0, np.nanmedian(cont[cont>0]), cont)
-                flux_plot = flux_enhanced / cont
-            else:
-                flux_plot = flux_enhanced
-
-            self.report = generate_spectral_report(wl_r, flux_plot, ivar_r, lines_dict, redshift_sigma_clip=params["REDSHIFT_SIGMA_CLIP"])
-            self.display_results()
-            self.plot_spectrum(wl_r, flux_r, flux_plot, lines_dict)
+        self.btn_analyze.setEnabled(False)
+        self.progress_bar.setValue(10)
+
+        worker = AnalysisWorker(self.file_path, self.source_type,
+                                self.current_params.copy(), SPECTRAL_LINES)
+        thread = QThread(self)
+        worker.moveToThread(thread)
+        thread.started.connect(worker.run)
+        worker.progress.connect(self.progress_bar.setValue)
+        worker.finished.connect(self._on_analysis_done)
+        worker.error.connect(self._on_analysis_error)
+        worker.finished.connect(thread.quit)
+        worker.error.connect(thread.quit)
+        thread.finished.connect(worker.deleteLater)
+        thread.finished.connect(thread.deleteLater)
+
+        self._analysis_worker = worker
+        self._analysis_thread = thread
+        thread.start()
+
+    def _on_analysis_done(self, result):
+        self.report = result['report']
+        self.display_results()
+        # Tras el setPlainText del reporte, un único append con todas las
+        # advertencias: un reflow del documento en vez de uno por línea
+        if result['warnings']:
+            self.results_text.append("\n".join(result['warnings']))
+        # Si el flujo procesado coincide con el original (sin normalización
+        # ni suavizado efectivo), trazar la curva gris duplicaría el trabajo
+        # de Agg sin aportar información
+        draw_original = (self.current_params["DO_CONTINUUM_NORM"]
+                         or not np.array_equal(result['flux_r'], result['flux_plot']))
+        self.plot_spectrum(result['wl_r'], result['flux_r'], result['flux_plot'],
+                           SPECTRAL_LINES, draw_original=draw_original)
+        self.progress_bar.setValue(100)
+        self.btn_save.setEnabled(True)
+        self._cleanup_analysis()
+
+    def _on_analysis_error(self, message):
+        QMessageBox.critical(self, "Error", f"Error durante el análisis: {message}")
+        self._cleanup_analysis()
+
+    def _cleanup_analysis(self):
+        self.btn_analyze.setEnabled(True)
+        self._analysis_thread = None
+        self._analysis_worker = None
 
-            self.progress_bar.setValue(100)
-            self.btn_save.setEnabled(True)
-            
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Error durante el análisis: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            
     def display_results(self):
         if not self.report:
             return
-            
-        self.results_text.clear()
-        self.results_text.append("=== REPORTE DE ANÁLISIS ESPECTRAL ===")
-        self.results_text.append(f"📊 Rango λ: {self.report['wavelength_range']['min']:.1f} - {self.report['wavelength_range']['max']:.1f} Å")
-        self.results_text.append(f"📈 SNR: {self.report['snr']:.1f}")
-        
-        if 'redshift' in self.report:
-            z_info = self.report['redshift']
+
+        wl_range = self.report['wavelength_range']
+        lines = [
+            "=== REPORTE DE ANÁLISIS ESPECTRAL ===",
+            f"📊 Rango λ: {wl_range['min']:.1f} - {wl_range['max']:.1f} Å",
+            f"📈 SNR: {self.report['snr']:.1f}",
+        ]
+
+        z_info = self.report.get('redshift')
+        if z_info is not None:
             rv_info = self.report['radial_velocity']
-            self.results_text.append(f"🔭 Redshift: {z_info['value']:.6f} ± {z_info['error']:.6f}")
-            self.results_text.append(f"🚀 Vel. radial: {rv_info['value']:.1f} ± {rv_info['error']:.1f} km/s")
-        
-    def plot_spectrum(self, wavelengths, flux_original, flux_processed, lines_dict):
-        self.canvas.ax.clear()
+            lines.append(f"🔭 Redshift: {z_info['value']:.6f} ± {z_info['error']:.6f}")
+            lines.append(f"🚀 Vel. radial: {rv_info['value']:.1f} ± {rv_info['error']:.1f} km/s")
+
+        # Un solo setPlainText: un reflow del documento en vez de uno por línea
+        self.results_text.setPlainText("\n".join(lines))
+
+    def plot_spectrum(self, wavelengths, flux_original, flux_processed, lines_dict,
+                      draw_original=True):
+        canvas = self.canvas
+        ax = canvas.ax
         theme = self.theme_manager.get_current_theme()
-        
-        self.canvas.ax.plot(wavelengths, flux_original, color=theme['text_muted'], alpha=0.6, linewidth=0.5, label="Original")
-        self.canvas.ax.plot(wavelengths, flux_processed, color=theme['accent'], linewidth=1, label="Procesado")
-        
-        for name, wl_line in lines_dict.items():
-            if wavelengths.min() <= wl_line <= wavelengths.max():
-                self.canvas.ax.axvline(wl_line, color=theme['warning'], linestyle='--', alpha=0.7)
-                self.canvas.ax.text(wl_line, max(flux_original)*0.9, name, rotation=90, color=theme['text_secondary'], fontsize=8)
-        
-        self.canvas.ax.legend(facecolor=theme['secondary'], edgecolor=theme['border'], labelcolor=theme['text_secondary'])
-        self.canvas.ax.set_title("Espectro completo", color=theme['text_primary'])
-        self.canvas.ax.set_xlabel("Longitud de onda (Å)", color=theme['text_secondary'])
-        self.canvas.ax.set_ylabel("Flujo", color=theme['text_secondary'])
-        self.canvas.ax.grid(True, alpha=0.2, color=theme['border'])
-
-        self.canvas.fig.tight_layout()
-        self.canvas.draw()
-        
+
+        # Diezmar a la resolución del canvas: pasar más de ~2 puntos por
+        # píxel al renderizador Agg es puro ancho de banda desperdiciado.
+        # El diezmado min/max por columna preserva picos y absorciones que
+        # un muestreo por zancada saltaría.
+        n_out = max(canvas.width(), 400)
+        if len(wavelengths) > 2 * n_out:
+            wavelengths_plot, flux_original_plot = _minmax_decimate(
+                wavelengths, flux_original, n_out)
+            _, flux_processed_plot = _minmax_decimate(
+                wavelengths, flux_processed, n_out)
+        else:
+            wavelengths_plot = wavelengths
+            flux_original_plot = flux_original
+            flux_processed_plot = flux_processed
+
+        # Camino rápido: si la curva original y los límites de los ejes no
+        # cambian (re-análisis del mismo archivo con otros parámetros),
+        # basta restaurar el fondo cacheado y blitear la curva procesada.
+        if (canvas._background is not None
+                and np.array_equal(canvas.line_orig.get_xdata(), wavelengths_plot)
+                and np.array_equal(canvas.line_orig.get_ydata(), flux_original_plot)):
+            ymin, ymax = ax.get_ylim()
+            if ymin <= np.min(flux_processed_plot) and np.max(flux_processed_plot) <= ymax:
+                canvas.line_proc.set_data(wavelengths_plot, flux_processed_plot)
+                canvas.line_proc.set_color(theme['accent'])
+                canvas.blit_processed()
+                return
+
+        # Actualizar datos de los artistas persistentes en vez de ax.clear().
+        # Con draw_original=False la curva gris se oculta (y sale de la
+        # leyenda) para no trazar dos veces el mismo camino en Agg.
+        canvas.line_orig.set_data(wavelengths_plot, flux_original_plot)
+        canvas.line_orig.set_color(theme['text_muted'])
+        canvas.line_orig.set_visible(draw_original)
+        canvas.line_orig.set_label("Original" if draw_original else "_nolegend_")
+        canvas.line_proc.set_data(wavelengths_plot, flux_processed_plot)
+        canvas.line_proc.set_color(theme['accent'])
+
+        canvas.clear_line_markers()
+        warning = theme['warning']
+        text_secondary = theme['text_secondary']
+        wl_min, wl_max = wavelengths.min(), wavelengths.max()
+        # Reducción C una sola vez: max() de Python itera el array elemento
+        # a elemento y antes se evaluaba dentro del bucle de marcas
+        y_top = float(flux_original.max()) * 0.9
+        if lines_dict is SPECTRAL_LINES:
+            line_names = _SPECTRAL_LINES_NAMES
+            line_wls = _SPECTRAL_LINES_WL
+        else:
+            line_names = list(lines_dict.keys())
+            line_wls = np.fromiter(lines_dict.values(), dtype=np.float64,
+                                   count=len(line_names))
+        visible = np.flatnonzero((line_wls >= wl_min) & (line_wls <= wl_max))
+        if visible.size:
+            # Una sola LineCollection para todas las marcas verticales en
+            # vez de un artista axvline por línea del catálogo
+            canvas.line_markers.append(
+                ax.vlines(line_wls[visible], 0, 1,
+                          transform=ax.get_xaxis_transform(),
+                          color=warning, linestyle='--', alpha=0.7))
+            for i in visible:
+                canvas.line_markers.append(
+                    ax.text(line_wls[i], y_top, line_names[i], rotation=90,
+                            color=text_secondary, fontsize=8))
+
+        ax.legend(facecolor=theme['secondary'], edgecolor=theme['border'], labelcolor=text_secondary)
+        ax.set_title("Espectro completo", color=theme['text_primary'])
+        ax.set_xlabel("Longitud de onda (Å)", color=text_secondary)
+        ax.set_ylabel("Flujo", color=text_secondary)
+        ax.grid(True, alpha=0.2, color=theme['border'])
+        ax.relim()
+        ax.autoscale_view()
+
+        # tight_layout solo en el primer trazado: recalcular la geometría en
+        # cada replot fuerza un layout completo que el backend luego repinta
+        if not canvas._layout_done:
+            canvas.fig.tight_layout()
+            canvas._layout_done = True
+        canvas.draw_idle()
+
     def save_results(self):
         if not self.report:
             QMessageBox.warning(self, "Advertencia", "No hay resultados para guardar.")
@@ -1751,25 +2227,32 @@ class MainWindow(QMainWindow):
         )
         if file_path:
             try:
+                wl_range = self.report['wavelength_range']
+                lines = [
+                    "=== REPORTE DE ANÁLISIS ESPECTRAL LAMOST ===\n",
+                    f"Archivo analizado: {self._file_basename}",
+                    f"Modo Fuente: {self.source_type}",
+                    f"Rango λ: {wl_range['min']:.1f} - {wl_range['max']:.1f} Å",
+                    f"SNR: {self.report['snr']:.1f}",
+                ]
+                z_info = self.report.get('redshift')
+                if z_info is not None:
+                    rv_info = self.report['radial_velocity']
+                    lines.append(f"Redshift: {z_info['value']:.6f} ± {z_info['error']:.6f}")
+                    lines.append(f"Vel. radial: {rv_info['value']:.1f} ± {rv_info['error']:.1f} km/s")
                 with open(file_path, 'w') as f:
-                    f.write("=== REPORTE DE ANÁLISIS ESPECTRAL LAMOST ===\n\n")
-                    f.write(f"Archivo analizado: {os.path.basename(self.file_path)}\n")
-                    f.write(f"Modo Fuente: {self.source_type}\n")
-                    f.write(f"Rango λ: {self.report['wavelength_range']['min']:.1f} - {self.report['wavelength_range']['max']:.1f} Å\n")
-                    f.write(f"SNR: {self.report['snr']:.1f}\n")
-                    if 'redshift' in self.report:
-                        z_info = self.report['redshift']
-                        rv_info = self.report['radial_velocity']
-                        f.write(f"Redshift: {z_info['value']:.6f} ± {z_info['error']:.6f}\n")
-                        f.write(f"Vel. radial: {rv_info['value']:.1f} ± {rv_info['error']:.1f} km/s\n")
+                    f.write("\n".join(lines) + "\n")
                 QMessageBox.information(self, "Éxito", f"Resultados guardados en: {file_path}")
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"No se pudieron guardar los resultados: {str(e)}")
 
     def reset_plot(self):
-        self.canvas.ax.clear()
-        self.canvas.update_plot_theme()
-        self.canvas.draw()
+        self.canvas.line_orig.set_data([], [])
+        self.canvas.line_proc.set_data([], [])
+        self.canvas.clear_line_markers()
+        self.canvas.ax.relim()
+        self.canvas.ax.autoscale_view()
+        self.canvas.draw_idle()
 
     def copy_results(self):
         if self.results_text.toPlainText():
@@ -1801,8 +2284,11 @@ class MainWindow(QMainWindow):
         self.logger.clear()
 
     def show_theme_settings(self):
-        dialog = SettingsDialog(self.theme_manager, self)
-        dialog.exec_()
+        if self._settings_dialog is None:
+            self._settings_dialog = SettingsDialog(self.theme_manager, self)
+        else:
+            self._settings_dialog.sync_from_manager()
+        self._settings_dialog.exec_()
 
     def batch_processing(self):
         QMessageBox.information(self, "Procesamiento por lotes", "Funcionalidad de procesamiento por lotes - En desarrollo")
@@ -14,7 +14,6 @@ import argparse
 import json
 import traceback
 
-import pandas as pd
 import numpy as np
 
 # --- Asegurar que 'src' esté en sys.path ---
@@ -23,17 +22,25 @@ src_dir = os.path.join(base_dir, "src")
 if os.path.isdir(src_dir) and src_dir not in sys.path:
     sys.path.insert(0, src_dir)
 
-# Backend de Matplotlib
-import matplotlib
-try:
-    import PyQt5
-    if not matplotlib.get_backend().lower().startswith('qt'):
-        matplotlib.use('Qt5Agg')
-except Exception:
-    pass
+# Backend de Matplotlib: la selección se hace bajo demanda y una sola
+# vez; la GUI incrusta sus propios canvas Qt y nunca paga este sondeo.
+# pyplot y SpanSelector se importan dentro de las funciones del modo CLI.
+_BACKEND_READY = False
+
 
-import matplotlib.pyplot as plt
-from matplotlib.widgets import SpanSelector
+def _ensure_qt_backend():
+    """Selecciona el backend Qt5Agg una sola vez antes de importar pyplot"""
+    global _BACKEND_READY
+    if _BACKEND_READY:
+        return
+    _BACKEND_READY = True
+    try:
+        import PyQt5  # noqa: F401 -- sondeo de disponibilidad
+        import matplotlib
+        if not matplotlib.get_backend().lower().startswith('qt'):
+            matplotlib.use('Qt5Agg')
+    except Exception:
+        pass
 
 # Importaciones del paquete original
 try:
@@ -53,17 +60,22 @@ except Exception as e:
 # ==============================================================================
 # CARGADOR UNIVERSAL (PARA ARCHIVOS NO LAMOST)
 # ==============================================================================
-from astropy.io import fits
-from astropy.table import Table
+_FLUX_NAMES = ('flux', 'FLUX', 'Flux', 'intensity', 'Intensity')
+_WAVE_NAMES = ('wavelength', 'WAVELENGTH', 'lambda', 'loglam')
+
 
 def load_spectrum_universal(file_path):
     """
     Carga FITS o TXT de forma universal.
     Devuelve: (wavelength, flux)
     """
+    # Import diferido: astropy solo hace falta al leer el archivo
+    from astropy.io import fits
+    from astropy.table import Table
+
     try:
         # --- LECTURA FITS ---
-        with fits.open(file_path) as hdul:
+        with fits.open(file_path, memmap=True) as hdul:
             data = hdul[1].data if len(hdul) > 1 else hdul[0].data
             header = hdul[0].header
             
@@ -72,12 +84,18 @@ def load_spectrum_universal(file_path):
             # Caso A: Tabla FITS
             if isinstance(data, fits.fitsrec.FITS_rec):
                 colnames = data.columns.names
-                flux_col = next((c for c in ['flux', 'FLUX', 'Flux', 'intensity', 'Intensity'] if c in colnames), None)
-                wave_col = next((c for c in ['wavelength', 'WAVELENGTH', 'lambda', 'loglam'] if c in colnames), None)
-                
+                # Buscar en un set: O(1) por candidato en tablas anchas
+                col_set = set(colnames)
+                flux_col = next((c for c in _FLUX_NAMES if c in col_set), None)
+                wave_col = next((c for c in _WAVE_NAMES if c in col_set), None)
+
                 if flux_col and wave_col:
-                    flux = data[flux_col]
-                    wavelength = data[wave_col]
+                    flux = np.array(data[flux_col], dtype=float)
+                    if wave_col == 'loglam':
+                        # loglam (SDSS) es log10(lambda): conversión vectorizada
+                        wavelength = np.power(10.0, np.asarray(data[wave_col], dtype=np.float64))
+                    else:
+                        wavelength = np.array(data[wave_col], dtype=float)
                 else:
                     if len(colnames) >= 2:
                         wavelength = np.array(data[colnames[0]])
@@ -91,14 +109,17 @@ def load_spectrum_universal(file_path):
                 crpix = header.get('CRPIX1', 1)
                 
                 if crval is not None and cdelt is not None:
+                    # linspace: una sola asignación en vez de tres arrays temporales
                     n_pixels = len(flux)
-                    wavelength = crval + (np.arange(n_pixels) - crpix + 1) * cdelt
+                    start = crval + (1 - crpix) * cdelt
+                    wavelength = np.linspace(start, start + (n_pixels - 1) * cdelt,
+                                             n_pixels, dtype=np.float64)
                 else:
                     wavelength = np.arange(len(flux))
             
             if wavelength is not None:
                 # Convertir a arrays de numpy estándar por seguridad
-                return np.array(wavelength), np.array(flux)
+                return np.asarray(wavelength), np.asarray(flux)
 
     except Exception as e:
         pass # Silencioso para logs limpios
@@ -121,22 +142,40 @@ def plot_spectrum_with_analysis(wavelengths, flux_original, flux_processed, line
     """
     Visualización interactiva (Modo CLI)
     """
+    _ensure_qt_backend()
+    import matplotlib.pyplot as plt
+    from matplotlib.widgets import SpanSelector
+
     fig, (ax_full, ax_zoom) = plt.subplots(2, 1, figsize=(14, 9), sharey=False)
     fig.canvas.manager.set_window_title("LAMOST Spectrum Analyzer - Visualizador")
 
-    ax_full.plot(wavelengths, flux_original, linewidth=0.5, alpha=0.6, label="Original", color='lightgray')
-    ax_full.plot(wavelengths, flux_processed, linewidth=1.0, label="Procesado", color='blue')
-
-    finite_flux = flux_processed[np.isfinite(flux_processed)]
-    y_max = np.max(finite_flux) * 1.1 if finite_flux.size > 0 else 1.0
-
-    for name, wavelength in lines_dict.items():
-        if wavelengths.min() <= wavelength <= wavelengths.max():
-            ax_full.axvline(wavelength, color="red", linestyle="--", alpha=0.6)
-            measurement = report.get('absorption_lines', {}).get(name, None)
-            if measurement and 'equivalent_width' in measurement:
-                ax_full.text(wavelength + 2, y_max * 0.9, f"{name}\nEW={measurement['equivalent_width']:.2f}Å",
-                             rotation=90, color="red", fontsize=7)
+    # rasterized: si el usuario exporta a PDF/SVG desde la barra de
+    # herramientas, las trazas densas se embeben como imagen en vez de
+    # decenas de miles de segmentos vectoriales; en PNG no cambia nada
+    ax_full.plot(wavelengths, flux_original, linewidth=0.5, alpha=0.6, label="Original", color='lightgray', rasterized=True)
+    ax_full.plot(wavelengths, flux_processed, linewidth=1.0, label="Procesado", color='blue', rasterized=True)
+
+    # nanmax: una sola pasada sin materializar la copia de valores finitos
+    y_max = np.nanmax(flux_processed) * 1.1
+    if not np.isfinite(y_max):
+        y_max = 1.0
+
+    # La longitud de onda es monótona tras el rebinado: los extremos son
+    # los bordes del array, sin re-escanearlo por cada línea del catálogo
+    wl_min, wl_max = wavelengths[0], wavelengths[-1]
+    # Catálogo como arrays paralelos: un solo test vectorizado de rango y
+    # el bucle de Python solo recorre las líneas visibles
+    line_names = list(lines_dict.keys())
+    line_wls = np.fromiter(lines_dict.values(), dtype=np.float64,
+                           count=len(line_names))
+    absorption_lines = report.get('absorption_lines', {})
+    for i in np.flatnonzero((line_wls >= wl_min) & (line_wls <= wl_max)):
+        name, wavelength = line_names[i], line_wls[i]
+        ax_full.axvline(wavelength, color="red", linestyle="--", alpha=0.6)
+        measurement = absorption_lines.get(name, None)
+        if measurement and 'equivalent_width' in measurement:
+            ax_full.text(wavelength + 2, y_max * 0.9, f"{name}\nEW={measurement['equivalent_width']:.2f}Å",
+                         rotation=90, color="red", fontsize=7)
 
     ax_full.set_xlabel("Longitud de onda (Å)")
     ax_full.set_ylabel("Flujo")
@@ -161,26 +200,30 @@ def plot_spectrum_with_analysis(wavelengths, flux_original, flux_processed, line
             xmin, xmax = xmax, xmin
         selected_span['xmin'], selected_span['xmax'] = float(xmin), float(xmax)
 
-        mask = (wavelengths >= xmin) & (wavelengths <= xmax)
-        if not np.any(mask):
+        # La longitud de onda es monótona: searchsorted da el rango en
+        # O(log N) y las vistas [i0:i1] evitan la máscara booleana y copias
+        i0 = np.searchsorted(wavelengths, xmin, side='left')
+        i1 = np.searchsorted(wavelengths, xmax, side='right')
+        if i1 <= i0:
             ax_zoom.clear()
             ax_zoom.text(0.5, 0.5, "Sin datos en la selección", ha='center', va='center', transform=ax_zoom.transAxes)
             fig.canvas.draw_idle()
             return
 
         ax_zoom.clear()
-        ax_zoom.plot(wavelengths[mask], flux_processed[mask], linewidth=1.2, color='blue')
-        y_min = np.nanmin(flux_processed[mask])
-        y_max_loc = np.nanmax(flux_processed[mask])
+        flux_sel = flux_processed[i0:i1]
+        ax_zoom.plot(wavelengths[i0:i1], flux_sel, linewidth=1.2, color='blue')
+        y_min = np.nanmin(flux_sel)
+        y_max_loc = np.nanmax(flux_sel)
         if not np.isfinite(y_min) or not np.isfinite(y_max_loc):
             ax_zoom.set_ylim(-1, 1)
         else:
             ax_zoom.set_ylim(y_min * 0.95, y_max_loc * 1.05)
 
-        for name, wl_line in lines_dict.items():
-            if xmin <= wl_line <= xmax:
-                ax_zoom.axvline(wl_line, color="red", linestyle="--", alpha=0.7)
-                ax_zoom.text(wl_line + (xmax - xmin) * 0.01, y_max_loc * 0.9, name, rotation=90, color="red", fontsize=8)
+        for i in np.flatnonzero((line_wls >= xmin) & (line_wls <= xmax)):
+            wl_line = line_wls[i]
+            ax_zoom.axvline(wl_line, color="red", linestyle="--", alpha=0.7)
+            ax_zoom.text(wl_line + (xmax - xmin) * 0.01, y_max_loc * 0.9, line_names[i], rotation=90, color="red", fontsize=8)
 
         ax_zoom.set_xlim(xmin, xmax)
         ax_zoom.set_title(f"Zoom región {xmin:.1f} - {xmax:.1f} Å")
@@ -196,12 +239,20 @@ def plot_spectrum_with_analysis(wavelengths, flux_original, flux_processed, line
     return fig, selected_span
 
 
-def analyze_file(fits_file, source_type="LAMOST"):
+def analyze_file(fits_file, source_type="LAMOST", hires=False):
     """
     Función modificada para aceptar 'source_type'.
     - Si es LAMOST: usa tu lógica original.
     - Si es UNIVERSAL: usa el nuevo cargador.
+    - hires=True guarda los PNG a 300 dpi (publicación); por defecto
+      150 dpi con compresión rápida, suficiente para uso interactivo.
     """
+    _ensure_qt_backend()
+    import matplotlib.pyplot as plt
+
+    save_dpi = 300 if hires else 150
+    pil_kwargs = None if hires else {'compress_level': 1}
+
     params = DEFAULT_PARAMS
     lines_dict = SPECTRAL_LINES
 
@@ -213,9 +264,17 @@ def analyze_file(fits_file, source_type="LAMOST"):
             if wl is None:
                 print("❌ Error: No se pudo leer el archivo en modo Universal.")
                 return False
-            
-            # Simulamos ivar
-            ivar = np.ones_like(flux) * 100.0 
+
+            # Algunos FITS/ASCII traen la longitud de onda descendente;
+            # los zooms por searchsorted y las lecturas de extremos
+            # asumen orden ascendente, así que se invierte aquí una vez
+            if len(wl) > 1 and wl[0] > wl[-1]:
+                wl = wl[::-1]
+                flux = flux[::-1]
+
+            # Simulamos ivar. El reporte solo lo lee, así que una vista
+            # broadcast de solo lectura evita materializar el array
+            ivar = np.broadcast_to(np.float64(100.0), flux.shape)
             # NOTA: Para archivos universales, nos saltamos la máscara y el rebinado inicial de LAMOST
             wl_r, flux_r, ivar_r = wl, flux, ivar
             
@@ -227,10 +286,11 @@ def analyze_file(fits_file, source_type="LAMOST"):
                 print("❌ No se pudo leer el archivo FITS. Verifica el archivo.")
                 return False
 
+            # Filtrado y rebinado fusionados: rebin_spectrum recoge los
+            # índices válidos directamente, sin copias enmascaradas
             m = valid_mask(flux, ivar)
-            wl, flux, ivar = wl[m], flux[m], ivar[m]
-
-            wl_r, flux_r, ivar_r = rebin_spectrum(wl, flux, ivar, factor=params.get("REBIN_FACTOR", 1))
+            wl_r, flux_r, ivar_r = rebin_spectrum(wl, flux, ivar,
+                                                  factor=params.get("REBIN_FACTOR", 1), mask=m)
             if len(flux_r) == 0 or not np.any(np.isfinite(flux_r)):
                 print("❌ No hay datos válidos después del rebinado.")
                 return False
@@ -249,8 +309,14 @@ def analyze_file(fits_file, source_type="LAMOST"):
         if params.get("DO_CONTINUUM_NORM", False):
             cont = running_percentile(flux_enhanced, win=params.get("CONTINUUM_WINDOW", 501),
                                       q=params.get("CONTINUUM_PERCENTILE", 95))
-            cont = np.where(cont <= 0, np.nanmedian(cont[cont>0]), cont)
-            flux_plot = flux_enhanced / cont
+            # Sustituir solo los valores no positivos por la mediana
+            # positiva, in situ: putmask no toca el resto del continuo
+            pos = cont > 0
+            med = np.median(cont[pos]) if pos.any() else 1.0
+            np.putmask(cont, ~pos, med)
+            # División in situ: flux_enhanced ya no se usa después
+            np.divide(flux_enhanced, cont, out=flux_enhanced)
+            flux_plot = flux_enhanced
         else:
             flux_plot = flux_enhanced
 
@@ -263,37 +329,46 @@ def analyze_file(fits_file, source_type="LAMOST"):
         xmin = selected_span.get('xmin')
         xmax = selected_span.get('xmax')
         if xmin is not None and xmax is not None:
-            mask = (wl_r >= xmin) & (wl_r <= xmax)
-            if np.any(mask):
+            # Rango por searchsorted: vistas sin máscara booleana intermedia
+            i0 = np.searchsorted(wl_r, xmin, side='left')
+            i1 = np.searchsorted(wl_r, xmax, side='right')
+            if i1 > i0:
                 fig_zoom, axz = plt.subplots(1, 1, figsize=(10, 4))
-                axz.plot(wl_r[mask], flux_plot[mask], linewidth=1.2, color='blue')
-                for name, wl_line in lines_dict.items():
-                    if xmin <= wl_line <= xmax:
-                        axz.axvline(wl_line, color='red', linestyle='--', alpha=0.7)
-                        axz.text(wl_line + (xmax-xmin)*0.01, np.nanmax(flux_plot[mask])*0.9, name,
-                                 rotation=90, color='red', fontsize=8)
+                flux_sel = flux_plot[i0:i1]
+                axz.plot(wl_r[i0:i1], flux_sel, linewidth=1.2, color='blue')
+                y_max_sel = np.nanmax(flux_sel)
+                line_names = list(lines_dict.keys())
+                line_wls = np.fromiter(lines_dict.values(), dtype=np.float64,
+                                       count=len(line_names))
+                for i in np.flatnonzero((line_wls >= xmin) & (line_wls <= xmax)):
+                    wl_line = line_wls[i]
+                    axz.axvline(wl_line, color='red', linestyle='--', alpha=0.7)
+                    axz.text(wl_line + (xmax-xmin)*0.01, y_max_sel*0.9, line_names[i],
+                             rotation=90, color='red', fontsize=8)
                 axz.set_xlim(xmin, xmax)
                 axz.set_xlabel("Longitud de onda (Å)")
                 axz.set_ylabel("Flujo")
                 axz.set_title(f"Zoom región {xmin:.1f} - {xmax:.1f} Å")
                 axz.grid(alpha=0.3)
                 fig_zoom.tight_layout()
-                fig_zoom.savefig('detailed_spectral_analysis_zoom.png', dpi=300, bbox_inches='tight')
+                fig_zoom.savefig('detailed_spectral_analysis_zoom.png', dpi=save_dpi,
+                                 bbox_inches='tight', pil_kwargs=pil_kwargs)
                 plt.close(fig_zoom)
                 print("Guardado: detailed_spectral_analysis_zoom.png")
         else:
-            fig.savefig('detailed_spectral_analysis.png', dpi=300, bbox_inches='tight')
+            fig.savefig('detailed_spectral_analysis.png', dpi=save_dpi,
+                        bbox_inches='tight', pil_kwargs=pil_kwargs)
             print("Guardado: detailed_spectral_analysis.png")
 
         with open('spectral_analysis_report.json', 'w', encoding='utf-8') as f:
             json.dump(report, f, indent=4, ensure_ascii=False)
 
-        pd.DataFrame({
-            'wavelength': wl_r,
-            'flux_original': flux_r,
-            'flux_processed': flux_plot,
-            'ivar': ivar_r
-        }).to_csv('processed_spectrum.csv', index=False)
+        # Escritura directa de las columnas: sin el desvío por un DataFrame
+        # que copia los cuatro arrays solo para llamar a to_csv
+        np.savetxt('processed_spectrum.csv',
+                   np.column_stack([wl_r, flux_r, flux_plot, ivar_r]),
+                   header='wavelength,flux_original,flux_processed,ivar',
+                   delimiter=',', fmt='%.7g', comments='')
 
         print("\n✅ Análisis completado.")
         return True
@@ -308,17 +383,19 @@ def main():
     parser = argparse.ArgumentParser(description='LAMOST Spectrum Analyzer - Universal Edition')
     parser.add_argument('--file', type=str, help='Archivo FITS/TXT para analizar (modo CLI)')
     # Nota: --gui ya no es necesario, es el modo por defecto si no se da archivo
-    parser.add_argument('--source', type=str, default='LAMOST', 
-                        choices=['LAMOST', 'UNIVERSAL'], 
+    parser.add_argument('--source', type=str, default='LAMOST',
+                        choices=['LAMOST', 'UNIVERSAL'],
                         help='Tipo de fuente de datos (default: LAMOST)')
-    
+    parser.add_argument('--hires', action='store_true',
+                        help='Guardar los PNG a 300 dpi (por defecto 150 dpi)')
+
     args = parser.parse_args()
 
     # LÓGICA ACTUALIZADA:
     # Si se pasa un archivo explícitamente, modo consola.
     # Si NO, lanzamos la GUI directamente.
     if args.file:
-        analyze_file(args.file, source_type=args.source)
+        analyze_file(args.file, source_type=args.source, hires=args.hires)
     else:
         # Intentar lanzar la GUI
         try: